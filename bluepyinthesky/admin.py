@@ -1,22 +1,10 @@
-import requests
-from .auth import Auth
+from .auth import Client
 import json
 
-class Admin:
+class Admin(Client):
     '''
     https://github.com/bluesky-social/atproto/tree/main/lexicons/com/atproto/admin  
     '''
-    def __init__(self):
-        self.url = Auth().url
-        self.encrypted_credentials = Auth().encrypted_credentials
-        self.decryption_key_path = Auth().decryption_key_path
-        self.decryption_key = Auth().decryption_key
-        self.access_jwt = Auth().access_jwt
-        self.refresh_jwt = Auth().refresh_jwt
-
-        self.credentials = Auth()._read_and_decrypt_credentials()
-        self.refreshSession = Auth().refreshSession
-
     def disableInviteCodes(self, codes=None, accounts=None):
         """
         Disable some set of invite codes and/or all codes associated with a set of users.
@@ -28,25 +16,29 @@ class Admin:
             codes (list, optional): List of invite codes to disable. Defaults to None.
             accounts (list, optional): List of user accounts whose codes should be disabled. Defaults to None.
         Returns:
-            dict: The JSON response from the API.
+            dict: The JSON response from the API, or an empty dict when the server sends no body.
         """
         request_url = f"{self.url}/com.atproto.admin.disableInviteCodes"
         headers = {
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        data = {
-            "codes": codes,
-            "accounts": accounts
-        }
-        response = requests.post(request_url, headers=headers, json=data)
+        data = {}
+        if codes is not None:
+            data["codes"] = codes
+        if accounts is not None:
+            data["accounts"] = accounts
+        response = self.http.post(request_url, headers=headers, json=data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.post(request_url, headers=headers, json=data)
+        if response.status_code != 200:
+            raise Exception(f"Error disabling invite codes: {response.status_code}, {response.text}")
+        # The procedure has no output, so a successful call usually returns an empty body.
+        if response.content:
+            return response.json()
+        return {}
         
     def getInviteCodes(self, sort='recent', limit=100, cursor=None):
         """
@@ -72,14 +64,13 @@ class Admin:
             'limit': limit,
             'cursor': cursor
         }
-        response = requests.get(request_url, headers=headers, params=params)
+        response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=params)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers, params=params)
+        json_response = response.json()
+        return json_response
 
     def getModerationAction(self, action_id):
         """
@@ -101,14 +92,13 @@ class Admin:
         json_data = {
             "id": action_id
         }
-        response = requests.get(request_url, headers=headers, json=json_data)
+        response = self.http.get(request_url, headers=headers, params=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers, params=json_data)
+        json_response = response.json()
+        return json_response
     
     def getModerationActions(self, subject=None, limit=50, cursor=None):
         """
@@ -134,14 +124,13 @@ class Admin:
             "limit": limit,
             "cursor": cursor
         }
-        response = requests.get(request_url, headers=headers, json=json_data)
+        response = self.http.get(request_url, headers=headers, params=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers, params=json_data)
+        json_response = response.json()
+        return json_response
         
     def getModerationReport(self, report_id):
         """
@@ -163,14 +152,13 @@ class Admin:
         json_data = {
             "id": report_id
         }
-        response = requests.get(request_url, headers=headers, json=json_data)
+        response = self.http.get(request_url, headers=headers, params=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers, params=json_data)
+        json_response = response.json()
+        return json_response
 
     def getModerationReports(self, subject=None, resolved=None, limit=50, cursor=None):
         """
@@ -192,20 +180,21 @@ class Admin:
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        json_data = {
+        params = {
             "subject": subject,
             "resolved": resolved,
             "limit": limit,
             "cursor": cursor
         }
-        response = requests.get(request_url, headers=headers, json=json_data)
+        if resolved is not None:
+            params["resolved"] = 'true' if resolved else 'false'
+        response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers, params=params)
+        json_response = response.json()
+        return json_response
         
     def getRecord(self, uri=None, cid=None):
         """
@@ -230,14 +219,13 @@ class Admin:
             json_data['uri'] = uri
         if cid is not None:
             json_data['cid'] = cid
-        response = requests.get(request_url, headers=headers, json=json_data)
+        response = self.http.get(request_url, headers=headers, params=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers, params=json_data)
+        json_response = response.json()
+        return json_response
         
     def getRepo(self, did):
         """
@@ -255,14 +243,13 @@ class Admin:
         json_data = {
             "did": did
         }
-        response = requests.get(request_url, headers=headers, json=json_data)
+        response = self.http.get(request_url, headers=headers, params=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers, params=json_data)
+        json_response = response.json()
+        return json_response
 
     def resolveModerationReports(self, action_id, report_ids, created_by):
         """
@@ -285,14 +272,13 @@ class Admin:
             "reportIds": report_ids,
             "createdBy": created_by
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.post(request_url, headers=headers, json=json_data)
+        json_response = response.json()
+        return json_response
         
     def reverseModerationAction(self, action_id, reason, created_by):
         """
@@ -315,11 +301,11 @@ class Admin:
             "reason": reason,
             "createdBy": created_by
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         else:
             json_response = response.json()
             return json_response
@@ -344,14 +330,13 @@ class Admin:
             "limit": limit,
             "cursor": cursor
         }
-        response = requests.get(request_url, headers=headers, json=json_data)
+        response = self.http.get(request_url, headers=headers, params=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers, params=json_data)
+        json_response = response.json()
+        return json_response
         
     def takeModerationAction(self, action, subject, reason, created_by):
         """
@@ -375,14 +360,13 @@ class Admin:
             "reason": reason,
             "createdBy": created_by
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.post(request_url, headers=headers, json=json_data)
+        json_response = response.json()
+        return json_response
         
     def updateAccountEmail(self, account, email):
         """
@@ -406,11 +390,11 @@ class Admin:
             "account": account,
             "email": email
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         else:
             json_response = response.json()
             return json_response
@@ -437,11 +421,11 @@ class Admin:
             "did": did,
             "handle": new_handle
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         else:
             json_response = response.json()
             return json_response
@@ -1,21 +1,21 @@
-import requests
-from .auth import Auth
+from .auth import Client
+from datetime import datetime, timezone
+from .identity import Identity
+from .resolver import HandleResolver
+from .richtext import FacetBuilder
 import json
 
-class App:
+class App(Client):
     '''
     https://github.com/bluesky-social/atproto/tree/main/lexicons/app/bsky 
     '''
-    def __init__(self):
-        self.url = Auth().url
-        self.encrypted_credentials = Auth().encrypted_credentials
-        self.decryption_key_path = Auth().decryption_key_path
-        self.decryption_key = Auth().decryption_key
-        self.access_jwt = Auth().access_jwt
-        self.refresh_jwt = Auth().refresh_jwt
-
-        self.credentials = Auth()._read_and_decrypt_credentials()
-        self.refreshSession = Auth().refreshSession
+    def __init__(self, auth=None):
+        """
+        Args:
+            auth (Auth, optional): The session to use. Defaults to a new Auth().
+        """
+        super().__init__(auth)
+        self.facet_builder = None
 
     def getProfile(self, actor):
         request_url = f"{self.url}/app.bsky.actor.getProfile"
@@ -26,12 +26,12 @@ class App:
         params = {
             'actor': actor
         }
-        response = requests.get(request_url, headers=headers, params=params)
+        response = self.http.get(request_url, headers=headers, params=params)
         
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=params)
+            response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code != 200:
             raise Exception(f"Error getting profile: {response.status_code}, {response.text}")
         return response.json()
@@ -45,11 +45,11 @@ class App:
         params = {
             'actors': actors
         }
-        response = requests.get(request_url, headers=headers, params=params)
+        response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=params)
+            response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code != 200:
             raise Exception(f"Error getting profiles: {response.status_code}, {response.text}")
         return response.json()
@@ -66,11 +66,11 @@ class App:
             params = {'limit': limit}
             if cursor:
                 params['cursor'] = cursor
-            response = requests.get(request_url, headers=headers, params=params)
+            response = self.http.get(request_url, headers=headers, params=params)
             if response.status_code == 401:  # Unauthorized
                 self.refreshSession()
                 headers['Authorization'] = f"Bearer {self.access_jwt}"
-                response = requests.get(request_url, headers=headers, params=params)
+                response = self.http.get(request_url, headers=headers, params=params)
             elif response.status_code != 200:
                 raise Exception(f"Error getting suggestions: {response.status_code}, {response.text}")
             json_response = response.json()
@@ -95,11 +95,11 @@ class App:
         if cursor is not None:
             params['cursor'] = cursor
 
-        response = requests.get(request_url, headers=headers, params=params)
+        response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=params)
+            response = self.http.get(request_url, headers=headers, params=params)
 
         json_response = response.json()
         return json_response
@@ -115,11 +115,11 @@ class App:
             'limit': limit
         }
 
-        response = requests.get(request_url, headers=headers, params=params)
+        response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=params)
+            response = self.http.get(request_url, headers=headers, params=params)
         
         json_response = response.json()
         return json_response
@@ -150,11 +150,11 @@ class App:
         }
         if cursor:
             params['cursor'] = cursor
-        response = requests.get(request_url, headers=headers, params=params)
+        response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=params)
+            response = self.http.get(request_url, headers=headers, params=params)
         json_response = response.json()
         return json_response
 
@@ -187,14 +187,18 @@ class App:
         if cursor:
             params['cursor'] = cursor
 
-        response = requests.get(request_url, headers=headers, params=params)
+        response = self.http.get(request_url, headers=headers, params=params)
+        if response.status_code == 401:  # Unauthorized
+            self.refreshSession()
+            headers['Authorization'] = f"Bearer {self.access_jwt}"
+            response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code != 200:
             raise Exception(f"Error getting likes: {response.status_code}, {response.text}")
 
         json_response = response.json()
         return json_response
     
-    def getPostThread(self, uri, depth=None):
+    def getPostThread(self, uri, depth=None, parent_height=None):
         """
         Retrieves the thread of a post given its URI.
         Usage:
@@ -204,6 +208,7 @@ class App:
         Args:
             uri (str): The URI of the post.
             depth (int, optional): The depth of the thread to retrieve. Defaults to None.
+            parent_height (int, optional): How many parent posts to include. Defaults to None.
         Returns:
             dict: The JSON response from the API.
         """
@@ -217,7 +222,13 @@ class App:
         }
         if depth is not None:
             params['depth'] = depth
-        response = requests.get(request_url, headers=headers, params=params)
+        if parent_height is not None:
+            params['parentHeight'] = parent_height
+        response = self.http.get(request_url, headers=headers, params=params)
+        if response.status_code == 401:  # Unauthorized
+            self.refreshSession()
+            headers['Authorization'] = f"Bearer {self.access_jwt}"
+            response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code != 200:
             if response.status_code == 404:
                 raise Exception(f"Post not found: {uri}")
@@ -246,34 +257,47 @@ class App:
             params["cid"] = cid
         if cursor:
             params["cursor"] = cursor
-        response = requests.get(request_url, headers=headers, params=params)
+        response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=params)
+            response = self.http.get(request_url, headers=headers, params=params)
         json_response = response.json()
         return json_response
     
     def getTimeline(self, algorithm=None, limit=50, cursor=None):
-        request_url = f"{self.url}/com.atproto.feed.getTimeline"
+        """
+        Fetches the home timeline of the authenticated account.
+        Usage:
+            api_handler = APIHandler()
+            response = api_handler.getTimeline(limit=50)
+            print(response)
+        Args:
+            algorithm (str, optional): The timeline algorithm to use. Defaults to None (reverse-chronological).
+            limit (int, optional): The maximum number of posts to return per request. Defaults to 50.
+            cursor (str, optional): The cursor indicating the start of the next page of results. Defaults to None.
+        Returns:
+            dict: The JSON response from the API.
+        """
+        request_url = f"{self.url}/app.bsky.feed.getTimeline"
         headers = {
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        json_data = {"limit": limit}
+        params = {"limit": limit}
         if algorithm:
-            json_data["algorithm"] = algorithm
+            params["algorithm"] = algorithm
         if cursor:
-            json_data["cursor"] = cursor
-        response = requests.post(request_url, headers=headers, json=json_data)
+            params["cursor"] = cursor
+        response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.get(request_url, headers=headers, params=params)
         return response.json()
     
     # App Graph Bsky - https://github.com/bluesky-social/atproto/tree/25c23b6b61eb8f1057fcedcbe7e93c183d3050a3/lexicons/app/bsky/graph
-    def follow(subject):
+    def follow(self, subject):
         """
         Creates a social follow.
         Usage:
@@ -285,20 +309,27 @@ class App:
         Returns:
             dict: The JSON response from the API.
         """
-        request_url = f"{self.url}/com.atproto.graph.follow"
+        request_url = f"{self.url}/com.atproto.repo.createRecord"
         headers = {
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        json_data = {"subject": subject}
-        response = requests.post(request_url, headers=headers, json=json_data)
+        json_data = {
+            "repo": self.did,
+            "collection": "app.bsky.graph.follow",
+            "record": {
+                "$type": "app.bsky.graph.follow",
+                "subject": subject,
+                "createdAt": datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+            }
+        }
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.post(request_url, headers=headers, json=json_data)
+        json_response = response.json()
+        return json_response
 
     def getFollowers(self, actor, limit=50, cursor=None):
         """
@@ -323,15 +354,15 @@ class App:
             'Authorization': f"Bearer {self.access_jwt}"
         }
         json_data = {
-            "actor": 'robcerda.com',
+            "actor": actor,
             "limit": limit,
             "cursor": cursor
         }
-        response = requests.get(request_url, headers=headers, params=json_data)
+        response = self.http.get(request_url, headers=headers, params=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=json_data)
+            response = self.http.get(request_url, headers=headers, params=json_data)
 
         json_response = response.json()
         if "error" in json_response:
@@ -363,14 +394,13 @@ class App:
             "limit": limit,
             "cursor": cursor
         }
-        response = requests.get(request_url, headers=headers, params=json_data)
+        response = self.http.get(request_url, headers=headers, params=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers, params=json_data)
+        json_response = response.json()
+        return json_response
 
     def getMutes(self, limit=50, cursor=None):
         """
@@ -390,18 +420,17 @@ class App:
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        json_data = {
+        params = {
             "limit": limit,
             "cursor": cursor
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers, params=params)
+        json_response = response.json()
+        return json_response
 
     def muteActor(self, actor):
         """
@@ -417,17 +446,17 @@ class App:
         """
         request_url = f"{self.url}/app.bsky.graph.muteActor"
         headers = {
-            'Content-Type': 'application/json; charset=utf-16',
+            'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
         json_data = {
             "actor": actor
         }
-        response = requests.post(request_url, headers=headers, data=json.dumps(json_data, ensure_ascii=False).encode('utf-16'))
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, data=json.dumps(json_data, ensure_ascii=False).encode('utf-16'))
+            response = self.http.post(request_url, headers=headers, json=json_data)
         if response.content:
             json_response = response.json()
             return json_response
@@ -438,17 +467,17 @@ class App:
     def unmuteActor(self, actor):
         request_url = f"{self.url}/app.bsky.graph.unmuteActor"
         headers = {
-            'Content-Type': 'application/json; charset=utf-16',
+            'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
         json_data = {
             "actor": actor
         }
-        response = requests.post(request_url, headers=headers, data=json.dumps(json_data, ensure_ascii=False).encode('utf-16'))
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, data=json.dumps(json_data, ensure_ascii=False).encode('utf-16'))
+            response = self.http.post(request_url, headers=headers, json=json_data)
         if response.content:
             json_response = response.json()
             return json_response
@@ -471,14 +500,13 @@ class App:
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        response = requests.get(request_url, headers=headers)
+        response = self.http.get(request_url, headers=headers)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers)
+        json_response = response.json()
+        return json_response
         
     def listNotifications(self, limit=50, cursor=None):
         """
@@ -502,14 +530,13 @@ class App:
             "limit": limit,
             "cursor": cursor
         }
-        response = requests.get(request_url, headers=headers, params=json_data)
+        response = self.http.get(request_url, headers=headers, params=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.get(request_url, headers=headers, params=json_data)
+        json_response = response.json()
+        return json_response
 
     def updateSeen(self, seen_at):
         """
@@ -531,11 +558,11 @@ class App:
         json_data = {
             "seenAt": seen_at
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         if response.content:
             json_response = response.json()
             return json_response
@@ -543,35 +570,23 @@ class App:
             return {"message": "No response from the server"} 
 
     # App Richtext Bsky - https://github.com/bluesky-social/atproto/tree/25c23b6b61eb8f1057fcedcbe7e93c183d3050a3/lexicons/app/bsky/richtext
-    def getFacet(text):
+    def getFacet(self, text):
         """
-        Extracts the facet features from a given text.
+        Extracts the facet features (mentions, links and hashtags) from a given text.
+        Facets are detected locally; mentioned handles are resolved to DIDs in one cached batch.
         Usage:
             api_handler = APIHandler()
-            text = "Check out this link https://example.com and mention @myfriend"
+            text = "Check out this link https://example.com and mention @myfriend.bsky.social"
             response = api_handler.getFacet(text=text)
             print(response)
         Args:
             text (str): The text to extract facet features from.
         Returns:
-            dict: The JSON response from the API.
+            list: The facets, with UTF-8 byte offsets, for the 'facets' field of a post record.
         """
-        request_url = f"{self.url}/app.bsky.richtext.facet"
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f"Bearer {self.access_jwt}"
-        }
-        json_data = {
-            "text": text
-        }
-        response = requests.post(request_url, headers=headers, json=json_data)
-        if response.status_code == 401:  # Unauthorized
-            self.refreshSession()
-            headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+        if self.facet_builder is None:
+            self.facet_builder = FacetBuilder(HandleResolver(client=Identity(auth=self.auth)))
+        return self.facet_builder.facets(text)
 
     # App Unspecced Bsky - https://github.com/bluesky-social/atproto/tree/25c23b6b61eb8f1057fcedcbe7e93c183d3050a3/lexicons/app/bsky/unspecced
     def getPopular(self, limit=50, cursor=None):
@@ -594,11 +609,11 @@ class App:
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        response = requests.get(request_url, headers=headers)
+        response = self.http.get(request_url, headers=headers)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers)
+            response = self.http.get(request_url, headers=headers)
         else:
             json_response = response.json()
             return json_response
\ No newline at end of file
@@ -0,0 +1,198 @@
+import json
+import os
+import threading
+import zlib
+import brotli
+from .app import App
+from .concurrency import RateLimiter, run_concurrently
+from .pagination import iter_pages
+
+SEGMENT_SUFFIX = '.ndjson.br'
+
+
+def safe_name(actor):
+    return actor.replace(':', '_').replace('/', '_')
+
+
+def segment_paths(directory, name):
+    """
+    The segment files of one stream, in the order they were written.
+    """
+    prefix = f"{name}."
+    return sorted(os.path.join(directory, entry) for entry in os.listdir(directory)
+                  if entry.startswith(prefix) and entry.endswith(SEGMENT_SUFFIX)
+                  and entry[len(prefix):-len(SEGMENT_SUFFIX)].isdigit())
+
+
+def read_archive(directory, name):
+    """
+    Yield every item of an archived stream, across all of its segments.
+    A segment cut short by a crash is read up to its last complete line.
+    Usage:
+        for item in read_archive("archive", "did_plc_sg22gxlwhuxtkwd5owhrqrhb"):
+            print(item["post"]["uri"])
+    Args:
+        directory (str): The archive directory.
+        name (str): The stream name: the actor's safe_name(), or 'shard-0003' for a sharded archive.
+    Returns:
+        generator: The feed items, as returned by getAuthorFeed.
+    """
+    for path in segment_paths(directory, name):
+        decompressor = brotli.Decompressor()
+        pending = b''
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(1 << 16)
+                if not chunk:
+                    break
+                try:
+                    pending += decompressor.process(chunk)
+                except brotli.error:
+                    # Torn write at the end of an interrupted segment: everything before it is intact.
+                    break
+                *lines, pending = pending.split(b'\n')
+                for line in lines:
+                    if line:
+                        yield json.loads(line)
+
+
+class StreamWriter:
+    '''
+    Appends NDJSON lines to one brotli-compressed segment file, flushing the compressor after every
+    write so the file is readable up to the last completed page even if the process dies.
+    '''
+    def __init__(self, path, quality=5):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.compressor = brotli.Compressor(quality=quality)
+        self.lock = threading.Lock()
+
+    def write(self, items):
+        data = b''.join(json.dumps(item, ensure_ascii=False).encode('utf-8') + b'\n' for item in items)
+        with self.lock:
+            self.file.write(self.compressor.process(data) + self.compressor.flush())
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            self.file.write(self.compressor.finish())
+            self.file.close()
+
+
+class FeedArchiver:
+    '''
+    Bulk export of many actors' full getAuthorFeed history to brotli-compressed NDJSON, one stream
+    per actor or per shard. Actors are paged concurrently and written page by page, so memory stays
+    flat. The cursor of every actor is saved after each page: an interrupted run picks up where it
+    stopped, writing to a new segment file next to the earlier ones.
+    '''
+    def __init__(self, directory='archive', shards=None, max_workers=8, rate=10, page_size=100, quality=5, client=None):
+        """
+        Args:
+            directory (str, optional): Where segments and cursor files are written. Defaults to 'archive'.
+            shards (int, optional): Write to this many shard streams instead of one stream per actor. Defaults to None.
+            max_workers (int, optional): Number of actors paged at once. Defaults to 8.
+            rate (float, optional): Requests per second across all workers. Defaults to 10.
+            page_size (int, optional): Posts requested per page. Defaults to 100.
+            quality (int, optional): Brotli quality, 0 (fastest) to 11 (smallest). Defaults to 5.
+            client (App or SessionPool, optional): The client to read feeds with. Defaults to a new App().
+        """
+        self.client = client or App()
+        self.directory = directory
+        self.state_directory = os.path.join(directory, 'cursors')
+        self.shards = shards
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.page_size = page_size
+        self.quality = quality
+        self.writers = {}
+        self.lock = threading.Lock()
+        os.makedirs(self.state_directory, exist_ok=True)
+
+    def archive(self, actors):
+        """
+        Export the full feed of every actor not already completed by an earlier run.
+        Usage:
+            archiver = FeedArchiver("archive", shards=16)
+            results = archiver.archive(tracked_dids)
+            print(sum(r["items"] for r in results.values() if isinstance(r, dict)))
+        Args:
+            actors (iterable): Handles or DIDs.
+        Returns:
+            dict: Per actor, its cursor state ('items' written so far, 'cursor', 'done'), or the exception that stopped it.
+        """
+        results = {}
+        try:
+            for actor, result, error in run_concurrently(self._archive_actor, actors, self.max_workers):
+                results[actor] = error if error is not None else result
+        finally:
+            with self.lock:
+                writers, self.writers = self.writers, {}
+            for writer in writers.values():
+                writer.close()
+        return results
+
+    def stream_name(self, actor):
+        if self.shards:
+            return f"shard-{zlib.crc32(actor.encode('utf-8')) % self.shards:04d}"
+        return safe_name(actor)
+
+    def state(self, actor):
+        """
+        The saved cursor state of an actor.
+        """
+        try:
+            with open(self._state_path(actor)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'items': 0, 'cursor': None, 'done': False}
+
+    def _archive_actor(self, actor):
+        state = self.state(actor)
+        if state['done']:
+            return state
+
+        def fetch(cursor=None, **kwargs):
+            self.rate_limiter.acquire()
+            return self.client.getAuthorFeed(cursor=cursor, **kwargs)
+
+        name = self.stream_name(actor)
+        writer = None
+        try:
+            for page in iter_pages(fetch, cursor=state['cursor'], actor=actor, limit=self.page_size):
+                items = page.get('feed') or []
+                if items:
+                    writer = writer or self._writer(name)
+                    writer.write(items)
+                # Saved after the page is on disk: a crash in between repeats that page, it never skips one.
+                state['items'] += len(items)
+                state['cursor'] = page.get('cursor')
+                self._save_state(actor, state)
+        finally:
+            # A per-actor stream is finished with its actor; shard streams stay open until the run ends.
+            if writer is not None and not self.shards:
+                with self.lock:
+                    self.writers.pop(name, None)
+                writer.close()
+        state['done'] = True
+        self._save_state(actor, state)
+        return state
+
+    def _writer(self, name):
+        with self.lock:
+            writer = self.writers.get(name)
+            if writer is None:
+                index = len(segment_paths(self.directory, name))
+                path = os.path.join(self.directory, f"{name}.{index:05d}{SEGMENT_SUFFIX}")
+                writer = self.writers[name] = StreamWriter(path, self.quality)
+            return writer
+
+    def _state_path(self, actor):
+        return os.path.join(self.state_directory, f"{safe_name(actor)}.json")
+
+    def _save_state(self, actor, state):
+        path = self._state_path(actor)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
@@ -1,18 +1,67 @@
 import requests
 import json
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken
 import base64
+import hashlib
+import os
+import threading
+import time
+from .endpoints import EndpointPool, PooledRequests
+
+DEFAULT_URL = 'https://bsky.social/xrpc'
+SESSION_CACHE_DIR = '.secrets/sessions'
+
+# Tokens closer than this to expiry are treated as expired, so a request is never
+# sent with a token that lapses in flight.
+EXPIRY_MARGIN = 60
+
+
+def jwt_expiry(token):
+    """
+    Read the exp claim of a JWT without verifying it.
+    Returns:
+        float: The expiry as a unix timestamp, or 0 if the token is missing or malformed.
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return 0
+
 
 class Auth:
-    def __init__(self):
-        self.url = 'https://bsky.social/xrpc'
-        self.encrypted_credentials = b''
+    def __init__(self, endpoints=None, session_cache=True, encrypted_credentials=None):
+        """
+        Args:
+            endpoints (list, optional): Several equivalent xrpc URLs to choose between by latency and health.
+                Defaults to None (always use DEFAULT_URL).
+            session_cache (bool, optional): Reuse tokens saved (encrypted) by an earlier process instead of
+                logging in again. Defaults to True.
+            encrypted_credentials (bytes, optional): Credentials encrypted with tools/crypto_helper.py, to log in
+                as an account other than the default one below. Defaults to None.
+        """
+        self.endpoints = EndpointPool(endpoints) if endpoints else None
+        # What every xrpc call is sent with: through the pool when there is one, so each call
+        # feeds its latency and error stats and fails over to another endpoint.
+        self.http = PooledRequests(self.endpoints) if self.endpoints else requests
+        self.default_url = DEFAULT_URL
+        self.encrypted_credentials = encrypted_credentials or b''
         self.decryption_key_path = '.secrets/secret.key'
         self.decryption_key = self._read_decryption_key(self.decryption_key_path)
         self.access_jwt = None
         self.refresh_jwt = None
+        self.did = None
+        self.lock = threading.Lock()
         self.credentials = self._read_and_decrypt_credentials()
-        self.createSession()
+        self.session_cache_path = self._session_cache_path() if session_cache else None
+        self._restore_session()
+
+    @property
+    def url(self):
+        if self.endpoints is None:
+            return self.default_url
+        return self.endpoints.best()
 
     def _read_and_decrypt_credentials(self):
         cipher_suite = Fernet(self.decryption_key)
@@ -31,24 +80,142 @@ class Auth:
         headers = {
             'Content-Type': 'application/json; charset=utf-16'
         }
-        response = requests.post(auth_url, headers=headers, data=json.dumps(self.credentials, ensure_ascii=False).encode('utf-16'))
+        response = self.http.post(auth_url, headers=headers, data=json.dumps(self.credentials, ensure_ascii=False).encode('utf-16'))
         response_data = response.json()
+        if response.status_code != 200:
+            raise Exception(f"Failed to create session. Status code: {response.status_code}, {response.text}")
+        self._set_session(response_data)
+
+    def refreshSession(self):
+        with self.lock:
+            refresh_tokens_url = f"{self.url}/com.atproto.server.refreshSession"
+            # refreshSession takes the refresh token in place of the access token, and no body.
+            headers = {
+                'Authorization': f"Bearer {self.refresh_jwt}"
+            }
+            response = self.http.post(refresh_tokens_url, headers=headers)
+            if response.status_code == 200:
+                self._set_session(response.json())
+            else:
+                print(f"Failed to refresh tokens. Status code: {response.status_code}")
+                print(f"Response text: {response.text}")
+
+    def _session_cache_path(self):
+        # One file per account, named without revealing the identifier.
+        identifier = str(self.credentials.get('identifier', '')).lower()
+        name = hashlib.sha256(identifier.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(SESSION_CACHE_DIR, f"{name}.session")
+
+    def _restore_session(self):
+        """
+        Start from the cached tokens when possible: use the access token while it is valid,
+        otherwise refresh with the refresh token, and only log in when both have expired.
+        """
+        session = self._load_session()
+        now = time.time()
+        if session and session.get('identifier') == self.credentials.get('identifier'):
+            self.access_jwt = session['accessJwt']
+            self.refresh_jwt = session['refreshJwt']
+            self.did = session['did']
+            if jwt_expiry(self.access_jwt) > now + EXPIRY_MARGIN:
+                return
+            if jwt_expiry(self.refresh_jwt) > now + EXPIRY_MARGIN:
+                access_jwt = self.access_jwt
+                self.refreshSession()
+                if self.access_jwt != access_jwt:
+                    return
+        self.createSession()
+
+    def _set_session(self, response_data):
         self.access_jwt = response_data['accessJwt']
         self.refresh_jwt = response_data['refreshJwt']
+        self.did = response_data.get('did', self.did)
+        self._save_session()
+
+    def _load_session(self):
+        if self.session_cache_path is None:
+            return None
+        try:
+            with open(self.session_cache_path, 'rb') as f:
+                return json.loads(Fernet(self.decryption_key).decrypt(f.read()))
+        except (OSError, InvalidToken, ValueError):
+            # Missing, written with another key, or corrupt: fall back to logging in.
+            return None
+
+    def _save_session(self):
+        if self.session_cache_path is None:
+            return
+        session = {
+            'identifier': self.credentials.get('identifier'),
+            'did': self.did,
+            'accessJwt': self.access_jwt,
+            'refreshJwt': self.refresh_jwt,
+        }
+        token = Fernet(self.decryption_key).encrypt(json.dumps(session).encode('utf-8'))
+        os.makedirs(os.path.dirname(self.session_cache_path), exist_ok=True)
+        # Write to a private temporary file and rename, so concurrent workers never read a partial file.
+        tmp_path = f"{self.session_cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(token)
+        os.replace(tmp_path, self.session_cache_path)
+
+
+class Client:
+    '''
+    Base of the lexicon classes. Every instance shares one Auth session and reads the url and
+    tokens from it on each request, so endpoint changes and refreshed tokens are picked up everywhere.
+    '''
+    def __init__(self, auth=None):
+        """
+        Args:
+            auth (Auth, optional): The session to use. Defaults to a new Auth().
+        """
+        self.auth = auth or Auth()
+        # A PdsRouter, for classes whose reads can go straight to the PDS hosting a repo.
+        self.router = None
+        self.encrypted_credentials = self.auth.encrypted_credentials
+        self.decryption_key_path = self.auth.decryption_key_path
+        self.decryption_key = self.auth.decryption_key
+
+        self.credentials = self.auth.credentials
+
+    @property
+    def url(self):
+        return self.auth.url
+
+    @property
+    def http(self):
+        return self.auth.http
+
+    @property
+    def access_jwt(self):
+        return self.auth.access_jwt
+
+    @property
+    def refresh_jwt(self):
+        return self.auth.refresh_jwt
+
+    @property
+    def did(self):
+        return self.auth.did
 
     def refreshSession(self):
-        refresh_tokens_url = f"{self.url}/com.atproto.server.refreshSession"
+        self.auth.refreshSession()
+
+    def _route(self, did):
+        """
+        Pick where a read of did's repo is sent: its own PDS when a router is set, otherwise self.url.
+        """
         headers = {
-            'Content-Type': 'application/json; charset=utf-16'
+            'Content-Type': 'application/json',
+            'Authorization': f"Bearer {self.access_jwt}"
         }
-        refresh_data = {
-            'refresh_token': self.refresh_jwt
-        }
-        response = requests.post(refresh_tokens_url, headers=headers, data=json.dumps(refresh_data, ensure_ascii=False).encode('utf-16'))
-        response_data = response.json()
-        if response.status_code == 200:
-            self.access_jwt = response_data['accessJwt']
-            self.refresh_jwt = response_data['refreshJwt']
-        else:
-            print(f"Failed to refresh tokens. Status code: {response.status_code}")
-            print(f"Response text: {response.text}")
+        if self.router is None:
+            return self.url, self.http, headers
+        url, session = self.router.route(did)
+        if url != self.url:
+            # Our token is only valid on our own service, and these reads are public anyway.
+            del headers['Authorization']
+        return url, session, headers
+
@@ -0,0 +1,121 @@
+import json
+import os
+import re
+import threading
+import time
+from .ipld import RAW, compute_cid
+from .repo import Repo
+
+
+def blob_cid(blob):
+    """
+    Compute the CID the PDS will assign to a blob.
+    Args:
+        blob (bytes): The blob data.
+    Returns:
+        str: The base32 CIDv1 (raw codec).
+    """
+    return compute_cid(blob, RAW)
+
+
+class BlobUploader:
+    '''
+    Wraps Repo.uploadBlob with a persistent, per-account index of blobs that were recently
+    uploaded, so the same bytes are only sent once.
+    A PDS garbage collects blobs that no record references, so an entry is only reused within
+    ttl seconds of its upload. The index is an append-only log: one line per upload or forget,
+    compacted when it is loaded, so several processes can share it.
+    Can be passed as the uploader of an ImagePipeline.
+    '''
+    def __init__(self, index_dir='.cache/blobs', account=None, ttl=3600, client=None):
+        """
+        Args:
+            index_dir (str, optional): Directory holding one index file per account. Defaults to '.cache/blobs'.
+            account (str, optional): The account the index belongs to. Defaults to the logged in identifier.
+            ttl (float, optional): Seconds an uploaded blob ref is reused for. Keep it within the PDS's
+                retention window for unreferenced blobs. None reuses refs forever. Defaults to 3600.
+            client (Repo, optional): The Repo instance used to upload. Defaults to a new Repo().
+        """
+        self.client = client or Repo()
+        account = account or self.client.credentials['identifier']
+        self.index_path = os.path.join(index_dir, re.sub(r'[^A-Za-z0-9._-]', '_', account) + '.jsonl')
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.index = self._load()
+
+    def uploadBlob(self, blob, mime_type=None):
+        """
+        Upload a blob unless an identical one was uploaded from this account within the ttl.
+        Usage:
+            uploader = BlobUploader()
+            response = uploader.uploadBlob(open("banner.jpg", "rb").read(), mime_type="image/jpeg")
+            print(response["blob"])
+        Args:
+            blob (bytes): The blob data to upload.
+            mime_type (str, optional): The MIME type of the blob. Defaults to None.
+        Returns:
+            dict: The same shape as Repo.uploadBlob, {"blob": <blob ref>}.
+        """
+        cid = blob_cid(blob)
+        with self.lock:
+            entry = self.index.get(cid)
+        if entry is not None and not self._expired(entry, time.time()):
+            return {"blob": entry['blob']}
+        response = self.client.uploadBlob(blob, mime_type=mime_type)
+        if 'blob' in response:
+            entry = {'cid': cid, 'blob': response['blob'], 'uploadedAt': time.time()}
+            with self.lock:
+                self.index[cid] = entry
+                self._append(entry)
+        return response
+
+    def forget(self, cid):
+        """
+        Drop a blob from the index, e.g. when the PDS has garbage collected it and the stored ref
+        is rejected. The next upload of the same bytes goes to the server again.
+        Args:
+            cid (str): The CID of the blob.
+        """
+        with self.lock:
+            if self.index.pop(cid, None) is not None:
+                self._append({'cid': cid, 'forget': True})
+
+    def _expired(self, entry, now):
+        return self.ttl is not None and now - entry['uploadedAt'] >= self.ttl
+
+    def _load(self):
+        index = {}
+        lines = 0
+        try:
+            with open(self.index_path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line torn by a crash mid-append.
+                        continue
+                    lines += 1
+                    if entry.get('forget'):
+                        index.pop(entry['cid'], None)
+                    else:
+                        index[entry['cid']] = entry
+        except FileNotFoundError:
+            return {}
+        now = time.time()
+        index = {cid: entry for cid, entry in index.items() if not self._expired(entry, now)}
+        if lines > 2 * len(index):
+            self._compact(index)
+        return index
+
+    def _append(self, entry):
+        os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+        # A single O_APPEND write per line, so appends from several processes never overwrite each other.
+        with open(self.index_path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    def _compact(self, index):
+        # Another process appending during the rename loses at most that entry, which only costs a re-upload.
+        tmp_path = f"{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.writelines(json.dumps(entry) + '\n' for entry in index.values())
+        os.replace(tmp_path, self.index_path)
@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+import threading
+import time
+
+MISSING = object()
+
+
+class TTLCache:
+    '''
+    Thread-safe in-memory cache whose entries expire after a time-to-live.
+    The oldest entries are evicted once maxsize is reached.
+    '''
+    def __init__(self, ttl=60, maxsize=10000):
+        """
+        Args:
+            ttl (float, optional): Default lifetime of an entry in seconds. Defaults to 60.
+            maxsize (int, optional): The maximum number of entries kept. Defaults to 10000.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.loading = {}
+        self.lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return default
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self.entries.pop(key, None)
+            self.entries[key] = (expires, value)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def get_or_load(self, key, loader, ttl=None):
+        """
+        Return the cached value for key, or call loader() to produce it.
+        Concurrent callers asking for the same missing key share a single loader() call.
+        Args:
+            key: The cache key.
+            loader (callable): Produces the value. Exceptions are passed to every waiting caller and not cached.
+            ttl (float or callable, optional): Lifetime of the loaded value, or a function of the value
+                returning it (e.g. shorter for negative results). Defaults to the cache's ttl.
+        Returns:
+            The cached or loaded value.
+        """
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        with self.lock:
+            # Another caller may have finished loading between the lookup above and taking the lock.
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return entry[1]
+            future = self.loading.get(key)
+            owner = future is None
+            if owner:
+                future = self.loading[key] = Future()
+        if not owner:
+            return future.result()
+        try:
+            value = loader()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.set(key, value, ttl(value) if callable(ttl) else ttl)
+            future.set_result(value)
+            return value
+        finally:
+            with self.lock:
+                del self.loading[key]
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not MISSING
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,80 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import threading
+import time
+
+
+class RateLimiter:
+    '''
+    Token bucket shared between threads. acquire() blocks until a request may be sent.
+    '''
+    def __init__(self, rate, burst=None):
+        """
+        Args:
+            rate (float): Requests allowed per second on average.
+            burst (int, optional): Requests that may go out back to back. Defaults to max(1, rate).
+        """
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+    def pause(self, seconds):
+        """
+        Stop handing out tokens for a while, e.g. after the server reported a rate limit.
+        """
+        with self.lock:
+            self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+def run_concurrently(func, items, max_workers=8, rate_limiter=None):
+    """
+    Call func on every item with bounded parallelism, yielding results as they complete.
+    Only a small window of items is in flight at once, so items can be a lazy iterable.
+    Usage:
+        for actor, result, error in run_concurrently(app.getProfile, actors, max_workers=4):
+            print(actor, error or result['handle'])
+    Args:
+        func (callable): Called as func(item).
+        items (iterable): The inputs.
+        max_workers (int, optional): Number of concurrent calls. Defaults to 8.
+        rate_limiter (RateLimiter, optional): Acquired before every call. Defaults to None.
+    Returns:
+        generator: (item, result, error) tuples in completion order; error is None on success.
+    """
+    def call(item):
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return func(item)
+
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = {}
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < max_workers * 2:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                in_flight[pool.submit(call, item)] = item
+            if not in_flight:
+                return
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                error = future.exception()
+                yield item, (None if error else future.result()), error
@@ -0,0 +1,189 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# Cheap, unauthenticated query every PDS and entryway serves.
+PROBE_NSID = 'com.atproto.server.describeServer'
+
+# Methods that are safe to send again to another endpoint after a timeout or a 5xx.
+IDEMPOTENT = ('GET', 'HEAD')
+
+
+class EndpointStats:
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.error_rate = 0.0
+        self.down_until = 0.0
+
+
+class EndpointPool:
+    '''
+    A set of equivalent xrpc endpoints (mirrors, regional entryways). Tracks a moving average of
+    latency and error rate per endpoint, prefers the fastest healthy one, and fails over when one degrades.
+    Measurements come from requests sent through request() and from periodic background probes.
+    Lexicon classes send every call through it by way of PooledRequests.
+    '''
+    def __init__(self, urls, alpha=0.3, max_error_rate=0.5, cooldown=30, probe_interval=30, timeout=10):
+        """
+        Args:
+            urls (list): The xrpc base URLs, e.g. ['https://bsky.social/xrpc', ...], in order of preference.
+            alpha (float, optional): Weight of the newest sample in the moving averages. Defaults to 0.3.
+            max_error_rate (float, optional): Error rate above which an endpoint is taken out of rotation. Defaults to 0.5.
+            cooldown (float, optional): Seconds an unhealthy endpoint stays out of rotation. Defaults to 30.
+            probe_interval (float, optional): Seconds between background probes, None to disable them. Defaults to 30.
+            timeout (float, optional): Request timeout in seconds. Defaults to 10.
+        """
+        if not urls:
+            raise ValueError("At least one endpoint is required")
+        self.stats = [EndpointStats(url.rstrip('/')) for url in urls]
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.probe_interval = probe_interval
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=32)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.prober = None
+
+    def best(self):
+        """
+        The URL of the endpoint to use right now.
+        """
+        return self.ranked()[0]
+
+    def ranked(self):
+        """
+        Every endpoint URL, best first: measured healthy endpoints by latency, then unmeasured
+        ones in their configured order, then the ones cooling down.
+        """
+        self._ensure_probing()
+        now = time.monotonic()
+        with self.lock:
+            order = list(enumerate(self.stats))
+            healthy = [(index, stats) for index, stats in order if stats.down_until <= now]
+            cooling = [(index, stats) for index, stats in order if stats.down_until > now]
+            healthy.sort(key=lambda item: (item[1].latency is None, item[1].latency or 0, item[0]))
+            cooling.sort(key=lambda item: item[1].down_until)
+            return [stats.url for _, stats in healthy + cooling]
+
+    def record(self, url, latency=None, ok=True):
+        """
+        Feed one observation of an endpoint into its moving averages.
+        Args:
+            url (str): The endpoint URL.
+            latency (float, optional): Seconds the request took; ignored for failures.
+            ok (bool, optional): Whether the request succeeded. Defaults to True.
+        """
+        with self.lock:
+            stats = next((s for s in self.stats if s.url == url), None)
+            if stats is None:
+                return
+            stats.error_rate = (1 - self.alpha) * stats.error_rate + self.alpha * (0.0 if ok else 1.0)
+            if ok and latency is not None:
+                stats.latency = latency if stats.latency is None else (1 - self.alpha) * stats.latency + self.alpha * latency
+            if stats.error_rate > self.max_error_rate:
+                stats.down_until = time.monotonic() + self.cooldown
+                # Give it a clean slate once the cooldown is over.
+                stats.error_rate = self.max_error_rate / 2
+            elif ok:
+                stats.down_until = 0.0
+
+    def request(self, method, nsid, **kwargs):
+        """
+        Send an xrpc request to the best endpoint, failing over to the next one on connection errors,
+        and for queries also on timeouts and 5xx responses. Procedures (POST) are only retried elsewhere
+        when the connection failed, since a timed out or failed write may still have been applied.
+        Usage:
+            pool = EndpointPool(["https://bsky.social/xrpc", "https://mirror.example.com/xrpc"])
+            response = pool.request('GET', 'app.bsky.actor.getProfile', params={'actor': 'robcerda.com'})
+        Args:
+            method (str): The HTTP method.
+            nsid (str): The xrpc method, e.g. 'app.bsky.feed.getTimeline'.
+            **kwargs: Passed on to requests.
+        Returns:
+            requests.Response: The first response that is not a 5xx, or the last 5xx if every endpoint failed.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        retry_on = (requests.ConnectionError, requests.Timeout) if method.upper() in IDEMPOTENT else requests.ConnectionError
+        error = None
+        response = None
+        for url in self.ranked():
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, f"{url}/{nsid}", **kwargs)
+            except retry_on as e:
+                self.record(url, ok=False)
+                error = e
+                continue
+            except requests.RequestException:
+                self.record(url, ok=False)
+                raise
+            if response.status_code >= 500:
+                self.record(url, ok=False)
+                if method.upper() in IDEMPOTENT:
+                    continue
+                return response
+            self.record(url, time.monotonic() - started, ok=True)
+            return response
+        if response is not None:
+            return response
+        raise error
+
+    def probe(self):
+        """
+        Measure every endpoint once, concurrently.
+        """
+        def measure(url):
+            started = time.monotonic()
+            try:
+                response = self.session.get(f"{url}/{PROBE_NSID}", timeout=self.timeout)
+                self.record(url, time.monotonic() - started, ok=response.status_code < 500)
+            except requests.RequestException:
+                self.record(url, ok=False)
+
+        threads = [threading.Thread(target=measure, args=(stats.url,), daemon=True) for stats in self.stats]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _ensure_probing(self):
+        if self.probe_interval is None or len(self.stats) < 2 or self.prober is not None:
+            return
+        with self.lock:
+            if self.prober is not None:
+                return
+            self.prober = threading.Thread(target=self._probe_forever, daemon=True)
+        self.prober.start()
+
+    def _probe_forever(self):
+        while True:
+            self.probe()
+            time.sleep(self.probe_interval)
+
+
+class PooledRequests:
+    '''
+    A stand-in for the requests module that sends calls to any of the pool's endpoints through
+    EndpointPool.request(), so every call updates the endpoint stats and can fail over.
+    URLs outside the pool (e.g. another PDS) go straight to the pool's session.
+    '''
+    def __init__(self, pool):
+        self.pool = pool
+
+    def request(self, method, url, **kwargs):
+        for stats in self.pool.stats:
+            if url.startswith(f"{stats.url}/"):
+                return self.pool.request(method, url[len(stats.url) + 1:], **kwargs)
+        return self.pool.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
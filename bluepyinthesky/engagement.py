@@ -0,0 +1,152 @@
+import numpy as np
+from .app import App
+from .concurrency import RateLimiter, run_concurrently
+from .interning import DidTable
+from .pagination import paginate
+
+KINDS = ('like', 'repost')
+
+
+class EngagementReport:
+    '''
+    Likes and reposts of a list of posts as compact arrays. Post i is uris[i]; the IDs (from table) of the
+    accounts that liked it are likers[like_indptr[i]:like_indptr[i + 1]], and likewise for reposters.
+    '''
+    def __init__(self, uris, table, like_indptr, likers, repost_indptr, reposters, errors):
+        self.uris = uris
+        self.table = table
+        self.like_indptr = like_indptr
+        self.likers = likers
+        self.repost_indptr = repost_indptr
+        self.reposters = reposters
+        self.errors = errors
+
+    @property
+    def like_counts(self):
+        return np.diff(self.like_indptr).astype(np.int32)
+
+    @property
+    def repost_counts(self):
+        return np.diff(self.repost_indptr).astype(np.int32)
+
+    def post_likers(self, index):
+        return self.likers[self.like_indptr[index]:self.like_indptr[index + 1]]
+
+    def post_reposters(self, index):
+        return self.reposters[self.repost_indptr[index]:self.repost_indptr[index + 1]]
+
+    def unique_likers(self):
+        return np.unique(self.likers)
+
+    def unique_reposters(self):
+        return np.unique(self.reposters)
+
+    def unique_engagers(self):
+        """
+        Sorted IDs of every account that liked or reposted at least one of the posts.
+        """
+        return np.union1d(self.likers, self.reposters)
+
+    def top_engagers(self, n=10):
+        """
+        The accounts with the most likes plus reposts across all the posts.
+        Returns:
+            list: (did, count) pairs, most engaged first.
+        """
+        counts = np.bincount(np.concatenate([self.likers, self.reposters]), minlength=len(self.table))
+        top = np.argsort(counts)[::-1][:n]
+        return [(self.table.lookup(i), int(counts[i])) for i in top if counts[i]]
+
+    def summary(self):
+        """
+        Per post counts, as a list of dicts ready for a CSV or JSON report.
+        """
+        return [{'uri': uri, 'likes': int(likes), 'reposts': int(reposts)}
+                for uri, likes, reposts in zip(self.uris, self.like_counts, self.repost_counts)]
+
+
+class EngagementAggregator:
+    '''
+    Collects the likes and reposts of many posts at once. Every (post, getLikes or getRepostedBy) pair
+    is paged to the end concurrently; results are streamed as records or folded into an EngagementReport.
+    '''
+    def __init__(self, max_workers=16, rate=20, page_size=100, table=None, client=None):
+        """
+        Args:
+            max_workers (int, optional): Number of posts' lists paged at once. Defaults to 16.
+            rate (float, optional): Requests per second across all workers. Defaults to 20.
+            page_size (int, optional): Accounts requested per page. Defaults to 100.
+            table (DidTable, optional): Interns engager DIDs; pass one to share IDs with other datasets.
+                Defaults to a new DidTable().
+            client (App or SessionPool, optional): The client to use. Defaults to a new App().
+        """
+        self.client = client or App()
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.page_size = page_size
+        self.table = table if table is not None else DidTable()
+
+    def stream(self, uris):
+        """
+        Yield one record per like or repost, as each post's list completes.
+        Usage:
+            for record in EngagementAggregator().stream(post_uris):
+                print(record["kind"], record["uri"], record["did"])
+        Args:
+            uris (iterable): The post URIs.
+        Returns:
+            generator: {'kind': 'like' | 'repost', 'uri', 'did'} dicts. A failed list is yielded
+                as {'kind', 'uri', 'error'} instead.
+        """
+        for (_, uri, kind), dids, error in self._collect(uris):
+            if error is not None:
+                yield {'kind': kind, 'uri': uri, 'error': str(error)}
+                continue
+            for did in dids:
+                yield {'kind': kind, 'uri': uri, 'did': did}
+
+    def aggregate(self, uris):
+        """
+        Per post counts and engager ID arrays for a list of posts.
+        Usage:
+            report = EngagementAggregator().aggregate(campaign_uris)
+            print(report.like_counts.sum(), len(report.unique_engagers()), report.errors)
+        Args:
+            uris (iterable): The post URIs. Duplicates are counted once.
+        Returns:
+            EngagementReport: The arrays, plus 'errors' mapping (uri, kind) to the error of a list that failed.
+        """
+        uris = list(dict.fromkeys(uris))
+        chunks = {kind: [None] * len(uris) for kind in KINDS}
+        errors = {}
+        for (index, uri, kind), dids, error in self._collect(uris):
+            if error is not None:
+                errors[(uri, kind)] = str(error)
+                continue
+            chunks[kind][index] = np.unique(self.table.intern_many(dids))
+        like_indptr, likers = self._csr(chunks['like'])
+        repost_indptr, reposters = self._csr(chunks['repost'])
+        return EngagementReport(uris, self.table, like_indptr, likers, repost_indptr, reposters, errors)
+
+    def _collect(self, uris):
+        tasks = ((index, uri, kind) for index, uri in enumerate(uris) for kind in KINDS)
+        return run_concurrently(self._engagers, tasks, self.max_workers)
+
+    def _engagers(self, task):
+        _, uri, kind = task
+        method = self.client.getLikes if kind == 'like' else self.client.getRepostedBy
+
+        def fetch(uri, cursor=None, limit=None):
+            self.rate_limiter.acquire()
+            return method(uri, limit=limit, cursor=cursor)
+
+        if kind == 'like':
+            return [like['actor']['did'] for like in paginate(fetch, 'likes', uri, limit=self.page_size)]
+        return [profile['did'] for profile in paginate(fetch, 'repostedBy', uri, limit=self.page_size)]
+
+    def _csr(self, chunks):
+        chunks = [chunk if chunk is not None else np.empty(0, dtype=np.int32) for chunk in chunks]
+        indptr = np.zeros(len(chunks) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, chunks), dtype=np.int64, count=len(chunks)), out=indptr[1:])
+        indices = np.concatenate(chunks).astype(np.int32) if chunks else np.empty(0, dtype=np.int32)
+        return indptr, indices
@@ -0,0 +1,263 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from .app import App
+from .concurrency import RateLimiter, run_concurrently
+from .pagination import iter_pages
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS feed_items (
+    feed TEXT NOT NULL,
+    item_key TEXT NOT NULL,
+    uri TEXT NOT NULL,
+    author TEXT,
+    sort_at TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (feed, item_key)
+);
+CREATE INDEX IF NOT EXISTS feed_items_sort_at ON feed_items (feed, sort_at);
+CREATE INDEX IF NOT EXISTS feed_items_uri ON feed_items (uri);
+
+CREATE TABLE IF NOT EXISTS feed_state (
+    feed TEXT PRIMARY KEY,
+    newest_key TEXT,
+    newest_at TEXT,
+    synced_at TEXT,
+    pending_key TEXT,
+    pending_at TEXT,
+    resume_cursor TEXT
+);
+'''
+
+# Columns added to feed_state after its first release, created on databases that predate them.
+STATE_COLUMNS = ('pending_key', 'pending_at', 'resume_cursor')
+
+PIN_REASON = 'app.bsky.feed.defs#reasonPin'
+
+
+def item_key(item):
+    """
+    Identify a feed item. A repost is a separate item from the original post, and from other reposts of it.
+    """
+    reason = item.get('reason') or {}
+    if reason.get('$type') == 'app.bsky.feed.defs#reasonRepost':
+        return f"{item['post']['uri']} repost:{reason.get('by', {}).get('did')}:{reason.get('indexedAt')}"
+    return item['post']['uri']
+
+
+def item_sort_at(item):
+    """
+    The time a feed item was placed in the feed: when it was reposted, or when the post was indexed.
+    """
+    reason = item.get('reason') or {}
+    return reason.get('indexedAt') or item['post'].get('indexedAt')
+
+
+class FeedSync:
+    '''
+    Incremental sync of author feeds and the home timeline into SQLite. Remembers the newest item
+    of the last completed sync per feed and stops paginating at the first page that reaches it, so a
+    feed with a few new posts costs one request instead of a full walk back through its history.
+    A sync cut short by max_pages keeps the old mark and saves where it stopped; the next sync
+    finishes that walk before it moves the mark, so no posts are skipped.
+    '''
+    def __init__(self, path='.cache/feeds.sqlite3', page_size=50, client=None):
+        """
+        Args:
+            path (str, optional): The SQLite database file. Defaults to '.cache/feeds.sqlite3'.
+            page_size (int, optional): Items requested per page. Defaults to 50.
+            client (App or SessionPool, optional): The client to read feeds with. sync_timeline needs an App:
+                the home timeline belongs to one account, so it cannot be spread over a pool. Defaults to a new App().
+        """
+        self.client = client or App()
+        self.page_size = page_size
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        columns = {row['name'] for row in self.db.execute('PRAGMA table_info(feed_state)')}
+        with self.db:
+            for column in STATE_COLUMNS:
+                if column not in columns:
+                    self.db.execute(f'ALTER TABLE feed_state ADD COLUMN {column} TEXT')
+        self.lock = threading.Lock()
+
+    def sync_author(self, actor, max_pages=None):
+        """
+        Store the posts an actor has made since the last sync.
+        Usage:
+            feeds = FeedSync()
+            print(feeds.sync_author("robcerda.com"))
+            print(feeds.items("author:robcerda.com", limit=10))
+        Args:
+            actor (str): The handle or DID of the author. The feed is stored as 'author:<actor>'.
+            max_pages (int, optional): Page limit, mainly to bound the first sync of a long feed. Later syncs
+                that hit it pick up where they stopped on the next call. Defaults to None.
+        Returns:
+            int: The number of items stored, counting again any that an interrupted sync had already stored.
+        """
+        return self._sync(f"author:{actor}", self.client.getAuthorFeed, max_pages, actor=actor)
+
+    def sync_timeline(self, algorithm=None, max_pages=None):
+        """
+        Store the home timeline items that appeared since the last sync. The feed is stored as 'timeline'.
+        Reads the timeline of the account the client is logged in as, so the client must be an App.
+        Args:
+            algorithm (str, optional): The timeline algorithm. Defaults to None.
+            max_pages (int, optional): Page limit, mainly to bound the first sync. Later syncs that hit it
+                pick up where they stopped on the next call. Defaults to None.
+        Returns:
+            int: The number of items stored, counting again any that an interrupted sync had already stored.
+        """
+        feed = f"timeline:{algorithm}" if algorithm else 'timeline'
+        return self._sync(feed, self.client.getTimeline, max_pages, algorithm=algorithm)
+
+    def sync_authors(self, actors, max_pages=None, max_workers=8, rate=10):
+        """
+        Sync many author feeds concurrently.
+        Usage:
+            results = FeedSync().sync_authors(tracked_handles)
+        Args:
+            actors (iterable): Handles or DIDs of the authors.
+            max_pages (int, optional): Page limit per author. Defaults to None.
+            max_workers (int, optional): Number of feeds synced at once. Defaults to 8.
+            rate (float, optional): Requests per second across all workers. Defaults to 10.
+        Returns:
+            dict: Per actor, the number of new items, or the exception that stopped its sync.
+        """
+        rate_limiter = RateLimiter(rate)
+        results = {}
+
+        def sync(actor):
+            return self._sync(f"author:{actor}", self.client.getAuthorFeed, max_pages, rate_limiter, actor=actor)
+
+        for actor, result, error in run_concurrently(sync, actors, max_workers):
+            results[actor] = error if error is not None else result
+        return results
+
+    def items(self, feed, since=None, until=None, limit=None):
+        """
+        Query stored items of a feed, newest first.
+        Args:
+            feed (str): 'author:<actor>', 'timeline' or 'timeline:<algorithm>'.
+            since (str, optional): Only items placed at or after this ISO-8601 timestamp.
+            until (str, optional): Only items placed before this ISO-8601 timestamp.
+            limit (int, optional): The maximum number of items to return.
+        Returns:
+            list: Feed view posts, as returned by the API.
+        """
+        sql = 'SELECT data FROM feed_items WHERE feed = ?'
+        params = [feed]
+        if since is not None:
+            sql += ' AND sort_at >= ?'
+            params.append(since)
+        if until is not None:
+            sql += ' AND sort_at < ?'
+            params.append(until)
+        sql += ' ORDER BY sort_at DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        with self.lock:
+            rows = self.db.execute(sql, params).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def state(self, feed):
+        """
+        The newest stored item key and time of a feed, and when it was last synced, or None if never synced.
+        pending_key, pending_at and resume_cursor are set while a sync cut short by max_pages is unfinished.
+        """
+        with self.lock:
+            row = self.db.execute('SELECT * FROM feed_state WHERE feed = ?', (feed,)).fetchone()
+        return dict(row) if row else None
+
+    def _sync(self, feed, method, max_pages, rate_limiter=None, **kwargs):
+        state = self.state(feed) or {}
+        newest_key, newest_at = state.get('newest_key'), state.get('newest_at')
+        pending_key, pending_at = state.get('pending_key'), state.get('pending_at')
+
+        def fetch(cursor=None, **kwargs):
+            if rate_limiter is not None:
+                rate_limiter.acquire()
+            return method(cursor=cursor, **kwargs)
+
+        stored = 0
+        if state.get('resume_cursor'):
+            # An earlier sync ran out of pages above the mark: walk on from where it stopped, down to the
+            # old mark, before the newer items it saw can become the mark.
+            count, _, _, cut_cursor, pages = self._walk(feed, fetch, state['resume_cursor'], newest_key, newest_at,
+                                                        max_pages, kwargs)
+            stored += count
+            if cut_cursor:
+                self._save_state(feed, newest_key, newest_at, pending_key, pending_at, cut_cursor)
+                return stored
+            newest_key, newest_at = pending_key, pending_at
+            if max_pages is not None:
+                max_pages -= pages
+                if max_pages <= 0:
+                    self._save_state(feed, newest_key, newest_at)
+                    return stored
+
+        count, first_key, first_at, cut_cursor, _ = self._walk(feed, fetch, None, newest_key, newest_at, max_pages, kwargs)
+        stored += count
+        if cut_cursor and first_key is not None and (newest_key or newest_at):
+            # Moving the mark now would skip everything between the last page fetched and the old mark.
+            self._save_state(feed, newest_key, newest_at, first_key, first_at, cut_cursor)
+        else:
+            # A first sync has no mark to fill down to: max_pages bounds it for good.
+            self._save_state(feed, first_key or newest_key, first_at or newest_at)
+        return stored
+
+    def _walk(self, feed, fetch, cursor, newest_key, newest_at, max_pages, kwargs):
+        """
+        Store the items of a feed from cursor down to the high-water mark.
+        Returns:
+            tuple: The number of items stored, the key and time of the first one, the cursor to continue from
+                if max_pages ran out before the mark was reached (else None), and the number of pages fetched.
+        """
+        stored = 0
+        first_key, first_at = None, None
+        pages = 0
+        reached = False
+        next_cursor = None
+        for page in iter_pages(fetch, max_pages=max_pages, cursor=cursor, limit=self.page_size, **kwargs):
+            pages += 1
+            # Where a further walk would continue from, unless the page leads nowhere new.
+            next_cursor = page.get('cursor') if page.get('cursor') != cursor else None
+            cursor = page.get('cursor')
+            # Pinned posts sit at the top of an author feed whatever their age, so they say nothing
+            # about how far back the new content goes.
+            entries = [item for item in page.get('feed') or [] if (item.get('reason') or {}).get('$type') != PIN_REASON]
+            new_items = []
+            for item in entries:
+                key = item_key(item)
+                sort_at = item_sort_at(item)
+                # Only the high-water mark ends a sync, not any stored item: the mark moves once a sync
+                # completes, while a sync that failed part way has stored pages above an unfilled gap.
+                if key == newest_key or (newest_at and sort_at and sort_at < newest_at):
+                    reached = True
+                    break
+                new_items.append((key, sort_at, item))
+            if new_items:
+                if first_key is None:
+                    first_key, first_at = new_items[0][0], new_items[0][1]
+                with self.lock, self.db:
+                    self.db.executemany(
+                        'INSERT OR REPLACE INTO feed_items (feed, item_key, uri, author, sort_at, data) VALUES (?, ?, ?, ?, ?, ?)',
+                        [(feed, key, item['post']['uri'], item['post'].get('author', {}).get('did'), sort_at, json.dumps(item))
+                         for key, sort_at, item in new_items])
+                stored += len(new_items)
+            if reached:
+                break
+        cut = not reached and next_cursor and max_pages is not None and pages >= max_pages
+        return stored, first_key, first_at, next_cursor if cut else None, pages
+
+    def _save_state(self, feed, newest_key, newest_at, pending_key=None, pending_at=None, resume_cursor=None):
+        synced_at = datetime.now(timezone.utc).isoformat()
+        with self.lock, self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO feed_state (feed, newest_key, newest_at, synced_at, pending_key, pending_at, '
+                'resume_cursor) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (feed, newest_key, newest_at, synced_at, pending_key, pending_at, resume_cursor))
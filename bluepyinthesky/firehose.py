@@ -0,0 +1,300 @@
+import asyncio
+import struct
+import threading
+import time
+from urllib.parse import urlencode
+from tornado.httpclient import HTTPClientError, HTTPRequest
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets
+from tornado.web import Application, HTTPError
+from tornado.websocket import WebSocketClosedError, WebSocketHandler, websocket_connect
+from .auth import Client
+
+# Recording file layout: a 5 byte header (magic + version) followed by one
+# record per WebSocket message. Each record is a 9 byte big-endian prefix of
+# (stream id, milliseconds since recording start, payload length) and then
+# the message payload exactly as the server sent it (one event frame).
+# Version 1 files stored raw HTTP chunks and are not readable as frames.
+MAGIC = b'BPFH'
+VERSION = 2
+FRAME_HEADER = struct.Struct('>BII')
+
+STREAMS = {
+    'com.atproto.sync.subscribeRepos': 0,
+    'com.atproto.label.subscribeLabels': 1,
+}
+STREAM_NAMES = {stream_id: name for name, stream_id in STREAMS.items()}
+
+
+def stream_url(url, name):
+    """
+    The WebSocket URL of a subscription on an xrpc base URL, e.g. https://bsky.social/xrpc
+    becomes wss://bsky.social/xrpc/com.atproto.sync.subscribeRepos.
+    """
+    if url.startswith('https://'):
+        url = 'wss://' + url[len('https://'):]
+    elif url.startswith('http://'):
+        url = 'ws://' + url[len('http://'):]
+    return f"{url.rstrip('/')}/{name}"
+
+
+def write_header(f):
+    f.write(MAGIC + bytes([VERSION]))
+
+
+def write_frame(f, stream_id, offset_ms, payload):
+    f.write(FRAME_HEADER.pack(stream_id, offset_ms, len(payload)))
+    f.write(payload)
+
+
+def read_frames(path, stream_id=None):
+    """
+    Iterate over the frames stored in a recording file.
+    Usage:
+        for stream_id, offset_ms, payload in read_frames("repos.bpfh"):
+            print(stream_id, offset_ms, len(payload))
+    Args:
+        path (str): The path of the recording file.
+        stream_id (int, optional): Only yield frames recorded from this stream. Defaults to None (all streams).
+    Returns:
+        generator: (stream_id, offset_ms, payload) tuples in recording order.
+    """
+    with open(path, 'rb') as f:
+        header = f.read(len(MAGIC) + 1)
+        if header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a firehose recording")
+        if header[len(MAGIC)] != VERSION:
+            raise ValueError(f"Unsupported recording version: {header[len(MAGIC)]}")
+        while True:
+            prefix = f.read(FRAME_HEADER.size)
+            if not prefix:
+                return
+            if len(prefix) < FRAME_HEADER.size:
+                raise ValueError(f"Truncated frame header in {path}")
+            frame_stream, offset_ms, length = FRAME_HEADER.unpack(prefix)
+            payload = f.read(length)
+            if len(payload) < length:
+                raise ValueError(f"Truncated frame payload in {path}")
+            if stream_id is None or frame_stream == stream_id:
+                yield frame_stream, offset_ms, payload
+
+
+class FirehoseRecorder(Client):
+    '''
+    Records subscribeRepos / subscribeLabels event frames, one record per WebSocket message,
+    to a length-prefixed file so they can be replayed later with FirehoseReplayServer.
+    '''
+    def record(self, path, streams=('com.atproto.sync.subscribeRepos',), cursor=None, max_frames=None, duration=None,
+               timeout=30):
+        """
+        Record frames from one or more event streams into a single file.
+        Usage:
+            recorder = FirehoseRecorder()
+            count = recorder.record("capture.bpfh", duration=60)
+            print(count)
+        Args:
+            path (str): The file to write the recording to.
+            streams (tuple, optional): The stream NSIDs to record. Defaults to subscribeRepos only.
+            cursor (int, optional): The last known event to backfill from. Defaults to None.
+            max_frames (int, optional): Stop after this many frames in total. Defaults to None.
+            duration (float, optional): Stop after this many seconds, even if no frame arrives. Defaults to None.
+            timeout (float, optional): Seconds to wait for a connection, or for the next frame before
+                giving up on a stalled stream. None waits forever. Defaults to 30.
+        Returns:
+            int: The number of frames written.
+        Raises:
+            Exception: If a stream cannot be opened, stalls, or is closed abnormally by the server.
+        """
+        for name in streams:
+            if name not in STREAMS:
+                raise ValueError(f"Unknown stream: {name}. Allowed values: {', '.join(STREAMS)}")
+        return asyncio.run(self._record(path, streams, cursor, max_frames, duration, timeout))
+
+    async def _record(self, path, streams, cursor, max_frames, duration, timeout):
+        started = time.monotonic()
+        deadline = started + duration if duration is not None else None
+        count = 0
+        connections = {}
+        reads = {}
+        try:
+            for name in streams:
+                connections[name] = await self._open_stream(name, cursor, timeout)
+            reads = {asyncio.ensure_future(connection.read_message()): name for name, connection in connections.items()}
+            with open(path, 'wb') as f:
+                write_header(f)
+                while reads:
+                    wait_for = timeout
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        wait_for = remaining if wait_for is None else min(wait_for, remaining)
+                    done, _ = await asyncio.wait(reads, timeout=wait_for, return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        if deadline is not None and time.monotonic() >= deadline:
+                            break
+                        raise TimeoutError(f"No frame received for {timeout}s from {', '.join(reads.values())}")
+                    for future in done:
+                        name = reads.pop(future)
+                        message = future.result()
+                        connection = connections[name]
+                        if message is None:
+                            # 1000 is a normal close, e.g. the end of a replayed recording.
+                            if connection.close_code != 1000:
+                                raise Exception(f"{name} closed: {connection.close_code}, {connection.close_reason}")
+                            continue
+                        if isinstance(message, str):
+                            message = message.encode('utf-8')
+                        write_frame(f, STREAMS[name], int((time.monotonic() - started) * 1000), message)
+                        count += 1
+                        if max_frames is not None and count >= max_frames:
+                            return count
+                        reads[asyncio.ensure_future(connection.read_message())] = name
+        finally:
+            for future in reads:
+                future.cancel()
+            for connection in connections.values():
+                connection.close()
+        return count
+
+    async def _open_stream(self, name, cursor, timeout):
+        request_url = stream_url(self.url, name)
+        if cursor is not None:
+            request_url += '?' + urlencode({'cursor': cursor})
+
+        def request():
+            headers = {
+                'Authorization': f"Bearer {self.access_jwt}"
+            }
+            return HTTPRequest(request_url, headers=headers, connect_timeout=timeout, request_timeout=timeout)
+
+        try:
+            try:
+                return await websocket_connect(request())
+            except HTTPClientError as e:
+                if e.code != 401:  # Unauthorized
+                    raise
+            self.refreshSession()
+            return await websocket_connect(request())
+        except HTTPClientError as e:
+            raise Exception(f"Error opening {name}: {e.code}, {e.message}")
+
+
+class FirehoseReplayServer:
+    '''
+    Local stand-in for the firehose endpoints that replays a recording over WebSocket, sending every
+    recorded frame as one binary message. Point a consumer's xrpc url at FirehoseReplayServer.url,
+    or a plain WebSocket consumer at stream_url(), to exercise it offline.
+    '''
+    def __init__(self, path, speed=1.0, host='127.0.0.1', port=0):
+        """
+        Args:
+            path (str): The recording file to replay.
+            speed (float, optional): Replay speed multiplier. 1.0 replays in real time, 10.0 ten times faster,
+                and None or 0 replays as fast as the consumer reads. Defaults to 1.0.
+            host (str, optional): The interface to listen on. Defaults to '127.0.0.1'.
+            port (int, optional): The port to listen on, 0 picks a free one. Defaults to 0.
+        """
+        self.path = path
+        self.speed = speed
+        self.sockets = bind_sockets(port, host)
+        self.loop = None
+        self.thread = None
+        self.ready = threading.Event()
+        self.handlers = set()
+
+    @property
+    def url(self):
+        host, port = self.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/xrpc"
+
+    def stream_url(self, name='com.atproto.sync.subscribeRepos'):
+        return stream_url(self.url, name)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        return self
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.loop.call_soon_threadsafe(self._shutdown)
+        self.thread.join()
+        self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def replay(self, stream_id):
+        """
+        Yield the payloads of one stream, sleeping between frames to honour the replay speed.
+        """
+        started = time.monotonic()
+        for _, offset_ms, payload in read_frames(self.path, stream_id):
+            if self.speed:
+                delay = started + offset_ms / 1000 / self.speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield payload
+
+    def _serve(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(self._listen())
+        self.ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            server.stop()
+            pending = asyncio.all_tasks(self.loop)
+            for task in pending:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self.loop.close()
+
+    async def _listen(self):
+        server = HTTPServer(Application([(r'/xrpc/([^/]+)', ReplayHandler, {'replayer': self})],
+                                       log_function=lambda handler: None))
+        server.add_sockets(self.sockets)
+        return server
+
+    def _shutdown(self):
+        for handler in list(self.handlers):
+            handler.close(1001, 'Replay server stopping')
+        self.loop.stop()
+
+
+class ReplayHandler(WebSocketHandler):
+    def initialize(self, replayer):
+        self.replayer = replayer
+        self.task = None
+
+    def prepare(self):
+        if self.path_args[0] not in STREAMS:
+            raise HTTPError(404, f"Unknown stream: {self.path_args[0]}")
+
+    def check_origin(self, origin):
+        return True
+
+    def open(self, name):
+        self.replayer.handlers.add(self)
+        self.task = asyncio.ensure_future(self._send(STREAMS[name]))
+
+    async def _send(self, stream_id):
+        try:
+            async for payload in self.replayer.replay(stream_id):
+                # Awaiting the write holds the replay back while the consumer is slower than the recording.
+                await self.write_message(payload, binary=True)
+        except WebSocketClosedError:
+            return
+        self.close(1000)
+
+    def on_close(self):
+        self.replayer.handlers.discard(self)
+        if self.task is not None:
+            self.task.cancel()
@@ -0,0 +1,172 @@
+import os
+import time
+import numpy as np
+from .app import App
+from .interning import DidTable
+from .pagination import paginate
+
+
+def mutuals(snapshot):
+    """
+    IDs of the accounts that both follow and are followed by the snapshot's actor.
+    """
+    return np.intersect1d(snapshot.followers, snapshot.follows, assume_unique=True)
+
+
+def diff(old, new):
+    """
+    Follower and follows churn between two snapshots of the same actor, taken from the same store.
+    Usage:
+        store = SnapshotStore()
+        old, new = store.history("did:plc:sg22gxlwhuxtkwd5owhrqrhb")[-2:]
+        churn = diff(old, new)
+        print(store.dids(churn['lost_followers']))
+    Returns:
+        dict: Sorted ID arrays 'new_followers', 'lost_followers', 'new_follows' and 'lost_follows'.
+    """
+    return {
+        'new_followers': np.setdiff1d(new.followers, old.followers, assume_unique=True),
+        'lost_followers': np.setdiff1d(old.followers, new.followers, assume_unique=True),
+        'new_follows': np.setdiff1d(new.follows, old.follows, assume_unique=True),
+        'lost_follows': np.setdiff1d(old.follows, new.follows, assume_unique=True),
+    }
+
+
+def overlap(a, b):
+    """
+    Audience overlap between two accounts' snapshots, taken from the same store.
+    Returns:
+        dict: The 'shared_followers' and 'shared_follows' ID arrays, and the Jaccard index of the follower sets.
+    """
+    shared = np.intersect1d(a.followers, b.followers, assume_unique=True)
+    union = len(a.followers) + len(b.followers) - len(shared)
+    return {
+        'shared_followers': shared,
+        'shared_follows': np.intersect1d(a.follows, b.follows, assume_unique=True),
+        'jaccard': len(shared) / union if union else 0.0,
+    }
+
+
+class FollowerSnapshot:
+    def __init__(self, actor, taken_at, followers, follows):
+        """
+        Args:
+            actor (str): The DID of the account.
+            taken_at (float): Unix time the snapshot was taken.
+            followers (numpy.ndarray): Sorted, unique int32 IDs of its followers.
+            follows (numpy.ndarray): Sorted, unique int32 IDs of the accounts it follows.
+        """
+        self.actor = actor
+        self.taken_at = taken_at
+        self.followers = followers
+        self.follows = follows
+
+
+class SnapshotStore:
+    '''
+    Snapshots of accounts' follower and follows lists as sorted int32 ID arrays on disk. All snapshots
+    in a store share one DidTable, so any two of them can be compared with vectorized set operations.
+    '''
+    def __init__(self, directory='.cache/follower_snapshots', page_size=100, client=None):
+        """
+        Args:
+            directory (str, optional): Where the snapshots and the DID table are kept. Defaults to '.cache/follower_snapshots'.
+            page_size (int, optional): Accounts requested per page. Defaults to 100.
+            client (App, optional): The App instance to use. Defaults to a new App().
+        """
+        self.client = client or App()
+        self.directory = directory
+        self.page_size = page_size
+        self.table_path = os.path.join(directory, 'dids.npz')
+        os.makedirs(directory, exist_ok=True)
+        self.table = DidTable.load(self.table_path) if os.path.exists(self.table_path) else DidTable()
+        # Rows in the table file; IDs are only ever appended, so the file is current while the table is no longer.
+        self.saved_size = len(self.table)
+
+    def take(self, actor):
+        """
+        Fetch an account's full follower and follows lists and save them as a new snapshot.
+        Usage:
+            store = SnapshotStore()
+            snapshot = store.take("robcerda.com")
+            print(len(snapshot.followers), len(mutuals(snapshot)))
+        Args:
+            actor (str): The handle or DID of the account.
+        Returns:
+            FollowerSnapshot: The new snapshot.
+        """
+        taken_at = time.time()
+        subject = []
+
+        def fetch(method, actor, cursor=None, limit=None):
+            page = method(actor, limit=limit, cursor=cursor)
+            if not subject and isinstance(page, dict) and 'subject' in page:
+                subject.append(page['subject']['did'])
+            return page
+
+        followers = self._ids(paginate(fetch, 'followers', self.client.getFollowers, actor, limit=self.page_size))
+        follows = self._ids(paginate(fetch, 'follows', self.client.getFollows, actor, limit=self.page_size))
+        snapshot = FollowerSnapshot(subject[0] if subject else actor, taken_at, followers, follows)
+        # The table first, so a snapshot on disk never refers to IDs the saved table lacks. A snapshot
+        # that only saw known accounts leaves the file alone rather than rewriting it unchanged.
+        size = len(self.table)
+        if size > self.saved_size:
+            self._write(self.table_path, **self.table.to_arrays())
+            self.saved_size = size
+        self._write(self._path(snapshot.actor, taken_at), actor=np.array(snapshot.actor), taken_at=np.array(taken_at),
+                    followers=followers, follows=follows)
+        return snapshot
+
+    def history(self, actor):
+        """
+        Every stored snapshot of an account, oldest first.
+        Args:
+            actor (str): The DID of the account.
+        """
+        return [self.load(path) for path in self._paths(actor)]
+
+    def churn(self, actor):
+        """
+        diff() between the two most recent snapshots of an account, or None if there are fewer than two.
+        """
+        paths = self._paths(actor)
+        if len(paths) < 2:
+            return None
+        return diff(self.load(paths[-2]), self.load(paths[-1]))
+
+    def load(self, path):
+        with np.load(path) as data:
+            return FollowerSnapshot(str(data['actor']), float(data['taken_at']), data['followers'], data['follows'])
+
+    def dids(self, ids):
+        """
+        The DIDs of an ID array returned by mutuals(), diff() or overlap().
+        """
+        return self.table.lookup_many(ids)
+
+    def _ids(self, profiles):
+        return np.unique(self.table.intern_many(profile['did'] for profile in profiles))
+
+    def _paths(self, actor):
+        # Compare the whole actor part of each name: a prefix match would give did:web:a the snapshots of did:web:a-b.
+        stem = self._stem(actor)
+        names = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npz'):
+                continue
+            head, _, stamp = name[:-len('.npz')].rpartition('-')
+            if head == stem and stamp.isdigit():
+                names.append(name)
+        return [os.path.join(self.directory, name) for name in sorted(names)]
+
+    def _stem(self, actor):
+        return actor.replace(':', '_')
+
+    def _path(self, actor, taken_at):
+        return os.path.join(self.directory, f"{self._stem(actor)}-{int(taken_at * 1000):015d}.npz")
+
+    def _write(self, path, **arrays):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, path)
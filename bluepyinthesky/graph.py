@@ -0,0 +1,94 @@
+from .app import App
+from .concurrency import RateLimiter, run_concurrently
+from .pagination import paginate
+
+
+class BulkGraph:
+    '''
+    Follow, mute and unmute many actors at once, skipping those already in the target state.
+    '''
+    def __init__(self, max_workers=8, rate=5, retries=3, client=None):
+        """
+        Args:
+            max_workers (int, optional): Number of concurrent requests. Defaults to 8.
+            rate (float, optional): Requests per second across all workers. Defaults to 5.
+            retries (int, optional): Attempts per actor after a rate limit response. Defaults to 3.
+            client (App, optional): The App instance to use. Defaults to a new App().
+        """
+        self.client = client or App()
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.retries = retries
+
+    def follow(self, actors):
+        """
+        Follow every actor that is not already followed.
+        Usage:
+            report = BulkGraph().follow(["did:example:123", "did:example:456"])
+            print(report["did:example:123"]["status"])
+        Args:
+            actors (iterable): DIDs of the actors to follow.
+        Returns:
+            dict: Per actor, {"status": "done" | "skipped" | "failed", "result" or "error": ...}.
+        """
+        following = self._identifiers(paginate(self.client.getFollows, 'follows', actor=self.client.did, limit=100))
+        return self._apply(self.client.follow, actors, lambda actor: actor in following)
+
+    def mute(self, actors):
+        """
+        Mute every actor that is not already muted.
+        Args:
+            actors (iterable): Handles or DIDs of the actors to mute.
+        Returns:
+            dict: Per actor, {"status": "done" | "skipped" | "failed", "result" or "error": ...}.
+        """
+        muted = self._identifiers(paginate(self.client.getMutes, 'mutes', limit=100))
+        return self._apply(self.client.muteActor, actors, lambda actor: actor in muted)
+
+    def unmute(self, actors):
+        """
+        Unmute every actor that is currently muted.
+        Args:
+            actors (iterable): Handles or DIDs of the actors to unmute.
+        Returns:
+            dict: Per actor, {"status": "done" | "skipped" | "failed", "result" or "error": ...}.
+        """
+        muted = self._identifiers(paginate(self.client.getMutes, 'mutes', limit=100))
+        return self._apply(self.client.unmuteActor, actors, lambda actor: actor not in muted)
+
+    def _identifiers(self, profiles):
+        identifiers = set()
+        for profile in profiles:
+            identifiers.add(profile['did'])
+            if profile.get('handle'):
+                identifiers.add(profile['handle'])
+        return identifiers
+
+    def _apply(self, method, actors, skip):
+        report = {}
+        todo = []
+        for actor in dict.fromkeys(actors):
+            if skip(actor):
+                report[actor] = {"status": "skipped"}
+            else:
+                todo.append(actor)
+
+        def call(actor):
+            for attempt in range(self.retries + 1):
+                # Every attempt, retries included, takes a token, so retries cannot burst past the shared rate.
+                self.rate_limiter.acquire()
+                response = method(actor)
+                if not (isinstance(response, dict) and response.get('error') == 'RateLimitExceeded'):
+                    break
+                # Back off for everyone, not just this worker: the next acquire() waits out the pause.
+                self.rate_limiter.pause(2 ** attempt)
+            if isinstance(response, dict) and 'error' in response:
+                raise Exception(f"{response['error']}: {response.get('message')}")
+            return response
+
+        for actor, result, error in run_concurrently(call, todo, self.max_workers):
+            if error is None:
+                report[actor] = {"status": "done", "result": result}
+            else:
+                report[actor] = {"status": "failed", "error": str(error)}
+        return report
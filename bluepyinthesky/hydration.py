@@ -0,0 +1,82 @@
+from .admin import Admin
+from .cache import MISSING, TTLCache
+from .concurrency import run_concurrently
+from .moderation_mirror import subject_did
+
+
+def _normalize(subject):
+    if isinstance(subject, str):
+        return {'uri': subject} if subject.startswith('at://') else {'did': subject}
+    return subject
+
+
+class SubjectHydrator:
+    '''
+    Fetches the repo and record details moderators need for a list of report subjects.
+    Repeated subjects are fetched once, lookups run concurrently, and results are cached for a short TTL.
+    '''
+    def __init__(self, ttl=60, max_workers=8, client=None):
+        """
+        Args:
+            ttl (float, optional): How long fetched details are reused, in seconds. Defaults to 60.
+            max_workers (int, optional): Number of concurrent requests. Defaults to 8.
+            client (Admin, optional): The Admin instance to use. Defaults to a new Admin().
+        """
+        self.client = client or Admin()
+        self.max_workers = max_workers
+        self.repos = TTLCache(ttl)
+        self.records = TTLCache(ttl)
+
+    def hydrate(self, subjects):
+        """
+        Fetch details for every subject.
+        Usage:
+            reports = Admin().getModerationReports(resolved=False)['reports']
+            details = SubjectHydrator().hydrate([report['subject'] for report in reports])
+            print(details["did:example:123"]["repo"])
+        Args:
+            subjects (iterable): Report subjects (repoRef / strongRef dicts), DIDs or at:// URIs.
+        Returns:
+            dict: subject key (DID or URI) -> {"repo": Admin.getRepo result, "record": Admin.getRecord result or None}.
+        """
+        subjects = [_normalize(subject) for subject in subjects]
+        dids = {subject_did(subject) for subject in subjects}
+        records = {(subject['uri'], subject.get('cid')) for subject in subjects if subject.get('uri')}
+
+        # Everything is resolved into this call's own dict so entries cannot expire half way through.
+        fetched = {}
+        jobs = []
+        for job in [('repo', did) for did in dids] + [('record', record) for record in records]:
+            kind, key = job
+            cached = (self.repos if kind == 'repo' else self.records).get(key)
+            if cached is MISSING:
+                jobs.append(job)
+            else:
+                fetched[job] = cached
+        for job, result, error in run_concurrently(self._fetch, jobs, self.max_workers):
+            if error is not None:
+                result = {'error': type(error).__name__, 'message': str(error)}
+            fetched[job] = result
+            # Failed lookups are not cached so the next view retries them.
+            if result is not None and 'error' not in result:
+                kind, key = job
+                (self.repos if kind == 'repo' else self.records).set(key, result)
+
+        details = {}
+        for subject in subjects:
+            did = subject_did(subject)
+            record = None
+            if subject.get('uri'):
+                record = fetched[('record', (subject['uri'], subject.get('cid')))]
+            details[subject.get('uri') or did] = {
+                'repo': fetched[('repo', did)],
+                'record': record
+            }
+        return details
+
+    def _fetch(self, job):
+        kind, key = job
+        if kind == 'repo':
+            return self.client.getRepo(key)
+        uri, cid = key
+        return self.client.getRecord(uri=uri, cid=cid)
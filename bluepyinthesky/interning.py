@@ -0,0 +1,111 @@
+import threading
+from itertools import islice
+import numpy as np
+
+# Strings pulled from the input of intern_many per lock acquisition.
+INTERN_CHUNK = 10000
+
+
+class DidTable:
+    '''
+    Interns DIDs (or handles, or any strings) as dense int32 IDs, assigned 0, 1, 2... in first-seen order.
+    Structures built from large result sets can then hold 4 byte IDs instead of repeating the strings.
+    '''
+    def __init__(self, dids=()):
+        """
+        Args:
+            dids (iterable, optional): Strings to intern up front, in ID order. Defaults to ().
+        """
+        self.ids = {}
+        self.strings = []
+        self.lock = threading.Lock()
+        self.intern_many(dids)
+
+    def intern(self, did):
+        """
+        The ID of did, assigning the next free one if it has not been seen before.
+        """
+        node = self.ids.get(did)
+        if node is not None:
+            return node
+        with self.lock:
+            node = self.ids.get(did)
+            if node is None:
+                node = self.ids[did] = len(self.strings)
+                self.strings.append(did)
+            return node
+
+    def intern_many(self, dids):
+        """
+        Intern every string of an iterable (e.g. a generator over paginated results) in one pass.
+        Usage:
+            table = DidTable()
+            ids = table.intern_many(f['did'] for f in paginate(app.getFollowers, 'followers', actor="robcerda.com"))
+        Returns:
+            numpy.ndarray: The int32 IDs, in input order.
+        """
+        ids = self.ids
+        strings = self.strings
+        out = []
+        dids = iter(dids)
+        while True:
+            # The input may be a network-backed generator: it is consumed outside the lock, one chunk
+            # at a time, so other threads using the table are only held up while IDs are assigned.
+            chunk = list(islice(dids, INTERN_CHUNK))
+            if not chunk:
+                break
+            with self.lock:
+                for did in chunk:
+                    node = ids.get(did)
+                    if node is None:
+                        node = ids[did] = len(strings)
+                        strings.append(did)
+                    out.append(node)
+        return np.array(out, dtype=np.int32)
+
+    def get(self, did, default=-1):
+        """
+        The ID of did without interning it, or default if it is unknown.
+        """
+        return self.ids.get(did, default)
+
+    def lookup(self, node):
+        return self.strings[node]
+
+    def lookup_many(self, nodes):
+        """
+        The strings of an array of IDs.
+        """
+        strings = self.strings
+        return [strings[node] for node in np.asarray(nodes).tolist()]
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __contains__(self, did):
+        return did in self.ids
+
+    def save(self, path):
+        """
+        Snapshot the table to an .npz file: every string, UTF-8 encoded, in one byte buffer plus an
+        int64 offset array. No pickling, and far smaller than the in-memory dict.
+        """
+        np.savez_compressed(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls.from_arrays(data['data'], data['offsets'])
+
+    def to_arrays(self):
+        with self.lock:
+            encoded = [did.encode('utf-8') for did in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded)), out=offsets[1:])
+        return {'data': np.frombuffer(b''.join(encoded), dtype=np.uint8), 'offsets': offsets}
+
+    @classmethod
+    def from_arrays(cls, data, offsets):
+        buffer = np.asarray(data, dtype=np.uint8).tobytes()
+        offsets = np.asarray(offsets).tolist()
+        return cls(buffer[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:]))
@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from .admin import Admin
+from .concurrency import RateLimiter, run_concurrently
+from .pagination import paginate
+from .server import Server
+
+
+def unused(code):
+    """
+    Predicate matching codes that have never been used.
+    """
+    return not code.get('uses')
+
+
+def older_than(days):
+    """
+    Predicate factory matching codes created more than the given number of days ago.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+
+    def predicate(code):
+        created_at = datetime.fromisoformat(code['createdAt'].replace('Z', '+00:00'))
+        return created_at < cutoff
+    return predicate
+
+
+def created_for(account):
+    """
+    Predicate factory matching codes created for the given account DID.
+    """
+    def predicate(code):
+        return code.get('forAccount') == account
+    return predicate
+
+
+def chunked(items, size):
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def split_batches(total, batch_size):
+    """
+    Split total into the fewest batches of at most batch_size, with sizes as even as possible.
+    """
+    if total <= 0:
+        return []
+    count = -(-total // batch_size)
+    size, extra = divmod(total, count)
+    return [size + 1] * extra + [size] * (count - extra)
+
+
+class InviteManager:
+    '''
+    Bulk invite code management: stream every code, disable codes by predicate in chunks,
+    and mint many codes with concurrent createInviteCodes batches.
+    '''
+    def __init__(self, max_workers=4, rate=5, admin=None, server=None):
+        """
+        Args:
+            max_workers (int, optional): Number of concurrent requests when minting. Defaults to 4.
+            rate (float, optional): Requests per second. Defaults to 5.
+            admin (Admin, optional): The Admin instance to use. Defaults to a new Admin().
+            server (Server, optional): The Server instance to use. Defaults to a new Server().
+        """
+        self.admin = admin or Admin()
+        self.server = server or Server()
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+
+    def codes(self, sort='recent', page_size=100):
+        """
+        Stream every invite code, following all cursors.
+        Usage:
+            for code in InviteManager().codes():
+                print(code["code"], code["available"])
+        Args:
+            sort (str, optional): 'recent' or 'usage'. Defaults to 'recent'.
+            page_size (int, optional): Codes requested per page. Defaults to 100.
+        Returns:
+            generator: Invite code views.
+        """
+        return paginate(self._get_page, 'codes', sort=sort, limit=page_size)
+
+    def disable(self, *predicates, chunk_size=100, dry_run=False):
+        """
+        Disable every enabled code matching all of the predicates, chunk_size codes per request.
+        Usage:
+            manager = InviteManager()
+            disabled = manager.disable(unused, older_than(30))
+            print(len(disabled))
+        Args:
+            *predicates (callable): Called with each code view; all must return True for the code to be disabled.
+            chunk_size (int, optional): Codes per disableInviteCodes request. Defaults to 100.
+            dry_run (bool, optional): Only report the codes that would be disabled. Defaults to False.
+        Returns:
+            list: The codes disabled (or that would be, on a dry run).
+        """
+        matching = (code['code'] for code in self.codes()
+                    if not code.get('disabled') and all(predicate(code) for predicate in predicates))
+        disabled = []
+        for chunk in chunked(matching, chunk_size):
+            if not dry_run:
+                self.rate_limiter.acquire()
+                self.admin.disableInviteCodes(codes=chunk)
+            disabled.extend(chunk)
+        return disabled
+
+    def mint(self, total, use_count=1, for_account=None, batch_size=100):
+        """
+        Create a large number of invite codes, split into even batches sent concurrently.
+        Usage:
+            result = InviteManager().mint(5000, use_count=1)
+            print(len(result["codes"]), result["errors"])
+        Args:
+            total (int): The number of codes to create.
+            use_count (int, optional): Uses allowed per code. Defaults to 1.
+            for_account (str, optional): The DID the codes are created for. Defaults to None.
+            batch_size (int, optional): The largest codeCount sent in one request. Defaults to 100.
+        Returns:
+            dict: The new 'codes', and the 'errors' of failed batches with the count each would have created.
+        """
+        def create(count):
+            response = self.server.createInviteCodes(code_count=count, use_count=use_count, for_account=for_account)
+            if 'error' in response:
+                raise Exception(f"Error creating invite codes: {response}")
+            return [code for account in response['codes'] for code in account['codes']]
+
+        codes = []
+        errors = []
+        for count, result, error in run_concurrently(create, split_batches(total, batch_size),
+                                                     self.max_workers, self.rate_limiter):
+            if error is not None:
+                errors.append({'count': count, 'error': str(error)})
+            else:
+                codes.extend(result)
+        return {'codes': codes, 'errors': errors}
+
+    def _get_page(self, sort, limit, cursor=None):
+        self.rate_limiter.acquire()
+        return self.admin.getInviteCodes(sort=sort, limit=limit, cursor=cursor)
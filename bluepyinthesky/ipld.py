@@ -0,0 +1,163 @@
+import base64
+import hashlib
+import struct
+
+# Multicodec codes used by atproto CIDs.
+DAG_CBOR = 0x71
+RAW = 0x55
+SHA2_256 = 0x12
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def cid_for(data, codec=DAG_CBOR):
+    """
+    Compute the CIDv1 (sha2-256) of some bytes, in its binary form.
+    Args:
+        data (bytes): The encoded block.
+        codec (int, optional): The multicodec of the block. Defaults to DAG_CBOR.
+    Returns:
+        bytes: The binary CID.
+    """
+    digest = hashlib.sha256(data).digest()
+    return _varint(1) + _varint(codec) + _varint(SHA2_256) + _varint(len(digest)) + digest
+
+
+def cid_to_str(cid):
+    return 'b' + base64.b32encode(cid).decode('ascii').lower().rstrip('=')
+
+
+def cid_from_str(value):
+    if not value.startswith('b'):
+        raise ValueError(f"Only base32 CIDs are supported: {value}")
+    body = value[1:].upper()
+    body += '=' * (-len(body) % 8)
+    cid = base64.b32decode(body)
+    version, _ = _read_varint(cid, 0)
+    if version != 1:
+        raise ValueError(f"Only CIDv1 is supported: {value}")
+    return cid
+
+
+def compute_cid(data, codec=DAG_CBOR):
+    """
+    Compute the string CID of some bytes, as returned by the API.
+    Usage:
+        cid = compute_cid(encode_dag_cbor(record))
+    Args:
+        data (bytes): The encoded block.
+        codec (int, optional): The multicodec of the block. Defaults to DAG_CBOR.
+    Returns:
+        str: The base32 CIDv1.
+    """
+    return cid_to_str(cid_for(data, codec))
+
+
+def record_cid(record):
+    """
+    Compute the CID a record will have once written to a repo.
+    Args:
+        record (dict): The record, in its JSON form (including "$type").
+    Returns:
+        str: The base32 CIDv1.
+    """
+    return compute_cid(encode_dag_cbor(record))
+
+
+def _head(major, value):
+    if value < 24:
+        return struct.pack('>B', major << 5 | value)
+    if value < 0x100:
+        return struct.pack('>BB', major << 5 | 24, value)
+    if value < 0x10000:
+        return struct.pack('>BH', major << 5 | 25, value)
+    if value < 0x100000000:
+        return struct.pack('>BI', major << 5 | 26, value)
+    return struct.pack('>BQ', major << 5 | 27, value)
+
+
+def _key_order(key):
+    encoded = key.encode('utf-8')
+    return len(encoded), encoded
+
+
+def _encode(value, out):
+    if value is None:
+        out.append(b'\xf6')
+    elif value is True:
+        out.append(b'\xf5')
+    elif value is False:
+        out.append(b'\xf4')
+    elif isinstance(value, int):
+        if value >= 0:
+            out.append(_head(0, value))
+        else:
+            out.append(_head(1, -1 - value))
+    elif isinstance(value, str):
+        encoded = value.encode('utf-8')
+        out.append(_head(3, len(encoded)))
+        out.append(encoded)
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(_head(2, len(value)))
+        out.append(bytes(value))
+    elif isinstance(value, (list, tuple)):
+        out.append(_head(4, len(value)))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        # The JSON forms of links and bytes map back to their CBOR types.
+        if len(value) == 1 and '$link' in value:
+            link = b'\x00' + cid_from_str(value['$link'])
+            out.append(_head(6, 42))
+            out.append(_head(2, len(link)))
+            out.append(link)
+            return
+        if len(value) == 1 and '$bytes' in value:
+            _encode(base64.b64decode(value['$bytes'] + '=' * (-len(value['$bytes']) % 4)), out)
+            return
+        for key in value:
+            if not isinstance(key, str):
+                raise TypeError(f"DAG-CBOR map keys must be strings, got {key!r}")
+        out.append(_head(5, len(value)))
+        for key in sorted(value, key=_key_order):
+            _encode(key, out)
+            _encode(value[key], out)
+    elif isinstance(value, float):
+        raise TypeError("Floats are not allowed in atproto records")
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} as DAG-CBOR")
+
+
+def encode_dag_cbor(value):
+    """
+    Encode a JSON-style value as canonical DAG-CBOR.
+    Args:
+        value: The value to encode. {"$link": ...} and {"$bytes": ...} are encoded as CID links and byte strings.
+    Returns:
+        bytes: The encoded block.
+    """
+    out = []
+    _encode(value, out)
+    return b''.join(out)
@@ -1,22 +1,11 @@
 import requests
-from .auth import Auth
+from .auth import Client
 import json
 
-class Label:
+class Label(Client):
     '''
     https://github.com/bluesky-social/atproto/tree/main/lexicons/com/atproto/label   
     '''
-    def __init__(self):
-        self.url = Auth().url
-        self.encrypted_credentials = Auth().encrypted_credentials
-        self.decryption_key_path = Auth().decryption_key_path
-        self.decryption_key = Auth().decryption_key
-        self.access_jwt = Auth().access_jwt
-        self.refresh_jwt = Auth().refresh_jwt
-
-        self.credentials = Auth()._read_and_decrypt_credentials()
-        self.refreshSession = Auth().refreshSession
- 
     def queryLabels(api_url, access_token, uri_patterns, sources=None, limit=50, cursor=None):
         """
         Queries labels relevant to the provided URI patterns.
@@ -72,12 +61,12 @@ class Label:
         json_data = {}
         if cursor is not None:
             json_data['cursor'] = cursor
-        response = requests.get(request_url, headers=headers, json=json_data, stream=True)
+        response = self.http.get(request_url, headers=headers, json=json_data, stream=True)
         # If unauthorized, refresh session and retry request
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, json=json_data, stream=True)
+            response = self.http.get(request_url, headers=headers, json=json_data, stream=True)
         # Parse response stream line by line
         for line in response.iter_lines():
             if line:
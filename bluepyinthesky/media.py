@@ -0,0 +1,135 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import io
+from PIL import Image, ImageOps
+from .repo import Repo
+
+# Limits the app.bsky image embeds accept.
+MAX_IMAGE_BYTES = 1_000_000
+MAX_IMAGE_DIMENSION = 2000
+
+
+def _encode(image, mime_type, quality):
+    buffer = io.BytesIO()
+    # No exif/icc/pnginfo arguments are passed and process_image clears img.info, which Pillow
+    # would otherwise fall back to (e.g. for icc_profile), so the re-encoded image carries no metadata.
+    if mime_type == 'image/png':
+        image.save(buffer, format='PNG', optimize=True)
+    else:
+        image.save(buffer, format='JPEG', quality=quality, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def process_image(image, max_dimension=MAX_IMAGE_DIMENSION, max_bytes=MAX_IMAGE_BYTES, quality=85, min_quality=40):
+    """
+    Downscale, strip metadata from and re-encode an image so it fits the upload limits.
+    Runs in a worker process, so it only takes and returns picklable values.
+    Args:
+        image (bytes or str): The image data, or a path to the image file.
+        max_dimension (int, optional): The longest side allowed, in pixels. Defaults to 2000.
+        max_bytes (int, optional): The largest encoded size allowed. Defaults to 1,000,000.
+        quality (int, optional): The JPEG quality to start from. Defaults to 85.
+        min_quality (int, optional): The lowest JPEG quality to try before downscaling further. Defaults to 40.
+    Returns:
+        dict: The encoded 'data', its 'mimeType' and an 'aspectRatio' with width and height.
+    """
+    if isinstance(image, str):
+        with open(image, 'rb') as f:
+            image = f.read()
+    with Image.open(io.BytesIO(image)) as source:
+        # Apply the exif orientation before the exif block is dropped.
+        img = ImageOps.exif_transpose(source)
+        img.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    # Only transparency is kept: it is part of the pixels of a palette image, not metadata.
+    img.info = {key: value for key, value in img.info.items() if key == 'transparency'}
+
+    has_alpha = img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info)
+    if has_alpha:
+        data = _encode(img, 'image/png', quality)
+        if len(data) <= max_bytes:
+            return {'data': data, 'mimeType': 'image/png', 'aspectRatio': {'width': img.width, 'height': img.height}}
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img.convert('RGBA'), mask=img.convert('RGBA').split()[-1])
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    while True:
+        for q in range(quality, min_quality - 1, -10):
+            data = _encode(img, 'image/jpeg', q)
+            if len(data) <= max_bytes:
+                return {'data': data, 'mimeType': 'image/jpeg', 'aspectRatio': {'width': img.width, 'height': img.height}}
+        if max(img.size) <= 1:
+            raise ValueError("Image cannot be encoded under the size limit")
+        img = img.resize((max(1, img.width * 3 // 4), max(1, img.height * 3 // 4)), Image.LANCZOS)
+
+
+class ImagePipeline:
+    '''
+    Prepares images in a process pool and uploads the results concurrently with Repo.uploadBlob.
+    '''
+    def __init__(self, max_dimension=MAX_IMAGE_DIMENSION, max_bytes=MAX_IMAGE_BYTES, quality=85,
+                 processes=None, upload_workers=4, uploader=None):
+        """
+        Args:
+            max_dimension (int, optional): The longest side allowed, in pixels. Defaults to 2000.
+            max_bytes (int, optional): The largest encoded size allowed. Defaults to 1,000,000.
+            quality (int, optional): The JPEG quality to start from. Defaults to 85.
+            processes (int, optional): Number of worker processes. Defaults to the CPU count.
+            upload_workers (int, optional): Number of concurrent uploads. Defaults to 4.
+            uploader (optional): Any object with an uploadBlob(blob, mime_type) method. Defaults to a new Repo().
+        """
+        self.max_dimension = max_dimension
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.processes = processes
+        self.upload_workers = upload_workers
+        self.uploader = uploader or Repo()
+
+    def process(self, images):
+        """
+        Prepare images without uploading them.
+        Args:
+            images (list): Image bytes or file paths.
+        Returns:
+            list: The results of process_image, in the same order as images.
+        """
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            futures = [self._submit(pool, image) for image in images]
+            return [future.result() for future in futures]
+
+    def upload(self, images, alts=None):
+        """
+        Prepare and upload images, ready to be used in an app.bsky.embed.images embed.
+        Usage:
+            pipeline = ImagePipeline()
+            embed = {"$type": "app.bsky.embed.images", "images": pipeline.upload(["photo.jpg"], alts=["A photo"])}
+        Args:
+            images (list): Image bytes or file paths.
+            alts (list, optional): Alt text for each image, the same length as images. Defaults to empty strings.
+        Returns:
+            list: One {"image", "alt", "aspectRatio"} dict per image, in the same order as images.
+        """
+        images = list(images)
+        alts = [''] * len(images) if alts is None else list(alts)
+        if len(alts) != len(images):
+            raise ValueError(f"Got {len(alts)} alt texts for {len(images)} images")
+        with ProcessPoolExecutor(max_workers=self.processes) as pool, \
+                ThreadPoolExecutor(max_workers=self.upload_workers) as uploads:
+            processing = [self._submit(pool, image) for image in images]
+            # Each upload starts as soon as its own image is ready rather than after the whole batch.
+            uploading = [uploads.submit(self._upload, future) for future in processing]
+            results = []
+            for future, alt in zip(uploading, alts):
+                blob, aspect_ratio = future.result()
+                results.append({'image': blob, 'alt': alt, 'aspectRatio': aspect_ratio})
+            return results
+
+    def _submit(self, pool, image):
+        return pool.submit(process_image, image, self.max_dimension, self.max_bytes, self.quality)
+
+    def _upload(self, processing):
+        processed = processing.result()
+        response = self.uploader.uploadBlob(processed['data'], mime_type=processed['mimeType'])
+        if 'blob' not in response:
+            raise Exception(f"Error uploading blob: {response}")
+        return response['blob'], processed['aspectRatio']
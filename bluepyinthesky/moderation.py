@@ -1,22 +1,10 @@
-import requests
-from .auth import Auth
+from .auth import Client
 import json
 
-class Moderation:
+class Moderation(Client):
     '''
     https://github.com/bluesky-social/atproto/tree/main/lexicons/com/atproto/moderation
     '''
-    def __init__(self):
-        self.url = Auth().url
-        self.encrypted_credentials = Auth().encrypted_credentials
-        self.decryption_key_path = Auth().decryption_key_path
-        self.decryption_key = Auth().decryption_key
-        self.access_jwt = Auth().access_jwt
-        self.refresh_jwt = Auth().refresh_jwt
-
-        self.credentials = Auth()._read_and_decrypt_credentials()
-        self.refreshSession = Auth().refreshSession
-    
     def createReport(self, reason_type, subject, reason=None, method='POST', data=None):
         """
         Report a repo or a record.
@@ -43,11 +31,11 @@ class Moderation:
         json_data = {"reasonType": reason_type, "subject": subject}
         if reason:
             json_data["reason"] = reason
-        response = requests.request(method, request_url, headers=headers, json=json_data)
+        response = self.http.request(method, request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.request(method, request_url, headers=headers, json=json_data)
+            response = self.http.request(method, request_url, headers=headers, json=json_data)
         else:
             json_response = response.json()
             return json_response
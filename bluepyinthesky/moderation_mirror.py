@@ -0,0 +1,268 @@
+import json
+import os
+import sqlite3
+import threading
+from .admin import Admin
+from .moderation_queue import subject_key
+from .pagination import iter_pages
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    subject TEXT NOT NULL,
+    subject_did TEXT NOT NULL,
+    reported_by TEXT,
+    reason_type TEXT,
+    resolved INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_subject ON reports (subject, resolved);
+CREATE INDEX IF NOT EXISTS reports_subject_did ON reports (subject_did, resolved);
+CREATE INDEX IF NOT EXISTS reports_reported_by ON reports (reported_by, created_at);
+CREATE INDEX IF NOT EXISTS reports_status ON reports (resolved, created_at);
+CREATE INDEX IF NOT EXISTS reports_created_at ON reports (created_at);
+
+CREATE TABLE IF NOT EXISTS actions (
+    id INTEGER PRIMARY KEY,
+    subject TEXT NOT NULL,
+    subject_did TEXT NOT NULL,
+    action TEXT,
+    created_by TEXT,
+    reversed INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS actions_subject ON actions (subject);
+CREATE INDEX IF NOT EXISTS actions_subject_did ON actions (subject_did);
+CREATE INDEX IF NOT EXISTS actions_created_by ON actions (created_by, created_at);
+CREATE INDEX IF NOT EXISTS actions_created_at ON actions (created_at);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    name TEXT PRIMARY KEY,
+    latest INTEGER NOT NULL
+);
+'''
+
+
+def subject_did(subject):
+    """
+    The DID a subject belongs to: the repo itself, or the authority of a record URI.
+    """
+    if subject.get('did'):
+        return subject['did']
+    return subject['uri'][len('at://'):].split('/', 1)[0]
+
+
+class ModerationMirror:
+    '''
+    Local SQLite copy of moderation reports and actions, indexed by subject, reporter,
+    status and time. sync() only pulls entries newer than the ones already stored; refresh()
+    re-reads stored entries to pick up later status changes, such as an older action being reversed.
+    '''
+    def __init__(self, path='.cache/moderation.sqlite3', client=None):
+        """
+        Args:
+            path (str, optional): The SQLite database file. Defaults to '.cache/moderation.sqlite3'.
+            client (Admin, optional): The Admin instance to sync from. Defaults to a new Admin().
+        """
+        self.client = client or Admin()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def sync(self, page_size=100):
+        """
+        Pull reports and actions created since the last sync.
+        Usage:
+            mirror = ModerationMirror()
+            print(mirror.sync())
+            print(mirror.reports(subject="did:example:123", resolved=False))
+        Args:
+            page_size (int, optional): Entries requested per page. Defaults to 100.
+        Returns:
+            dict: The number of new 'reports' and 'actions' stored.
+        """
+        new_reports = self._sync_table('reports', self.client.getModerationReports, self._store_report, page_size)
+        new_actions = self._sync_table('actions', self.client.getModerationActions, self._store_action, page_size)
+        return {'reports': new_reports, 'actions': new_actions}
+
+    def refresh(self, since=None, page_size=100):
+        """
+        Re-read reports and actions, newest first, and update the stored entries whose status changed.
+        Usage:
+            mirror = ModerationMirror()
+            mirror.sync()
+            print(mirror.refresh(since="2023-06-01T00:00:00Z"))
+        Args:
+            since (str, optional): Only re-read entries created at or after this ISO-8601 timestamp.
+                Defaults to None (everything).
+            page_size (int, optional): Entries requested per page. Defaults to 100.
+        Returns:
+            dict: The number of 'reports' and 'actions' that were updated or added.
+        """
+        reports = self._refresh_table('reports', self.client.getModerationReports, self._store_report, since, page_size)
+        actions = self._refresh_table('actions', self.client.getModerationActions, self._store_action, since, page_size)
+        return {'reports': reports, 'actions': actions}
+
+    def reports(self, subject=None, reported_by=None, resolved=None, since=None, until=None, limit=None):
+        """
+        Query stored reports, newest first.
+        Args:
+            subject (str, optional): A DID or record URI. A DID also matches reports on that repo's records.
+            reported_by (str, optional): The DID of the reporter.
+            resolved (bool, optional): Only resolved (True) or open (False) reports.
+            since (str, optional): Only reports created at or after this ISO-8601 timestamp.
+            until (str, optional): Only reports created before this ISO-8601 timestamp.
+            limit (int, optional): The maximum number of reports to return.
+        Returns:
+            list: Report views.
+        """
+        clauses, params = [], []
+        if subject is not None:
+            column = 'subject_did' if subject.startswith('did:') else 'subject'
+            clauses.append(f'{column} = ?')
+            params.append(subject)
+        if reported_by is not None:
+            clauses.append('reported_by = ?')
+            params.append(reported_by)
+        if resolved is not None:
+            clauses.append('resolved = ?')
+            params.append(int(resolved))
+        return self._query('reports', clauses, params, since, until, limit)
+
+    def actions(self, subject=None, created_by=None, since=None, until=None, limit=None):
+        """
+        Query stored actions, newest first.
+        Args:
+            subject (str, optional): A DID or record URI. A DID also matches actions on that repo's records.
+            created_by (str, optional): The DID of the moderator.
+            since (str, optional): Only actions created at or after this ISO-8601 timestamp.
+            until (str, optional): Only actions created before this ISO-8601 timestamp.
+            limit (int, optional): The maximum number of actions to return.
+        Returns:
+            list: Action views.
+        """
+        clauses, params = [], []
+        if subject is not None:
+            column = 'subject_did' if subject.startswith('did:') else 'subject'
+            clauses.append(f'{column} = ?')
+            params.append(subject)
+        if created_by is not None:
+            clauses.append('created_by = ?')
+            params.append(created_by)
+        return self._query('actions', clauses, params, since, until, limit)
+
+    def report(self, report_id):
+        """
+        Get one report, fetching it with Admin.getModerationReport if it is not stored yet.
+        """
+        found = self._query('reports', ['id = ?'], [report_id], None, None, 1)
+        if found:
+            return found[0]
+        report = self.client.getModerationReport(report_id)
+        if report and 'id' in report:
+            with self.lock, self.db:
+                self._store_report(report)
+        return report
+
+    def action(self, action_id):
+        """
+        Get one action, fetching it with Admin.getModerationAction if it is not stored yet.
+        """
+        found = self._query('actions', ['id = ?'], [action_id], None, None, 1)
+        if found:
+            return found[0]
+        action = self.client.getModerationAction(action_id)
+        if action and 'id' in action:
+            with self.lock, self.db:
+                self._store_action(action)
+        return action
+
+    def _sync_table(self, table, method, store, page_size):
+        # The high-water mark is only moved once a sync completes, so an interrupted sync is simply
+        # repeated, and entries stored out of order by report()/action() cannot hide older ones.
+        with self.lock:
+            row = self.db.execute('SELECT latest FROM sync_state WHERE name = ?', (table,)).fetchone()
+        latest = row['latest'] if row else None
+        newest = latest
+        stored = 0
+        # Both lists are served newest first, so stop at the first page that reaches known entries.
+        for page in iter_pages(method, limit=page_size):
+            entries = page.get(table) or []
+            new_entries = [entry for entry in entries if latest is None or entry['id'] > latest]
+            with self.lock, self.db:
+                for entry in new_entries:
+                    store(entry)
+            stored += len(new_entries)
+            if new_entries:
+                newest = max(newest or 0, max(entry['id'] for entry in new_entries))
+            if len(new_entries) < len(entries):
+                break
+        if newest is not None:
+            with self.lock, self.db:
+                self.db.execute('INSERT OR REPLACE INTO sync_state (name, latest) VALUES (?, ?)', (table, newest))
+        return stored
+
+    def _refresh_table(self, table, method, store, since, page_size):
+        updated = 0
+        for page in iter_pages(method, limit=page_size):
+            entries = page.get(table) or []
+            current = [entry for entry in entries if since is None or (entry.get('createdAt') or '') >= since]
+            with self.lock, self.db:
+                for entry in current:
+                    row = self.db.execute(f'SELECT data FROM {table} WHERE id = ?', (entry['id'],)).fetchone()
+                    if row is None or row['data'] != json.dumps(entry):
+                        store(entry)
+                        updated += 1
+            # Served newest first, so the first entry older than since ends the pass.
+            if len(current) < len(entries):
+                break
+        return updated
+
+    def _store_report(self, report):
+        self.db.execute(
+            'INSERT OR REPLACE INTO reports (id, subject, subject_did, reported_by, reason_type, resolved, created_at, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (report['id'], subject_key(report['subject']), subject_did(report['subject']), report.get('reportedBy'),
+             report.get('reasonType'), int(bool(report.get('resolvedByActionIds'))), report.get('createdAt'),
+             json.dumps(report)))
+
+    def _store_action(self, action):
+        self.db.execute(
+            'INSERT OR REPLACE INTO actions (id, subject, subject_did, action, created_by, reversed, created_at, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (action['id'], subject_key(action['subject']), subject_did(action['subject']), action.get('action'),
+             action.get('createdBy'), int(bool(action.get('reversal'))), action.get('createdAt'), json.dumps(action)))
+        # Reports resolved by a new action are no longer open, even though the report itself is not new:
+        # update the stored view along with the column so both agree.
+        report_ids = action.get('resolvedReportIds') or []
+        if report_ids:
+            rows = self.db.execute(
+                f"SELECT id, data FROM reports WHERE id IN ({', '.join('?' * len(report_ids))})", report_ids).fetchall()
+            for row in rows:
+                report = json.loads(row['data'])
+                resolved_by = report.get('resolvedByActionIds') or []
+                if action['id'] not in resolved_by:
+                    report['resolvedByActionIds'] = resolved_by + [action['id']]
+                self.db.execute('UPDATE reports SET resolved = 1, data = ? WHERE id = ?', (json.dumps(report), row['id']))
+
+    def _query(self, table, clauses, params, since, until, limit):
+        if since is not None:
+            clauses.append('created_at >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('created_at < ?')
+            params.append(until)
+        sql = f'SELECT data FROM {table}'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY id DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        with self.lock:
+            rows = self.db.execute(sql, params).fetchall()
+        return [json.loads(row['data']) for row in rows]
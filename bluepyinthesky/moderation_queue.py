@@ -0,0 +1,161 @@
+import json
+import os
+import threading
+from itertools import islice
+from .admin import Admin
+from .concurrency import RateLimiter, run_concurrently
+from .pagination import paginate
+
+
+def subject_key(subject):
+    """
+    A hashable key for a report subject: the DID of a repo or the URI of a record.
+    """
+    return subject.get('uri') or subject.get('did')
+
+
+def group_by_subject(reports):
+    """
+    Group reports so that one moderation action can resolve all reports on the same subject.
+    Args:
+        reports (iterable): Report views from Admin.getModerationReports.
+    Returns:
+        dict: subject key -> (subject, list of reports), in first-seen order.
+    """
+    groups = {}
+    for report in reports:
+        key = subject_key(report['subject'])
+        if key not in groups:
+            groups[key] = (report['subject'], [])
+        groups[key][1].append(report)
+    return groups
+
+
+class ModerationWorker:
+    '''
+    Works through the queue of unresolved moderation reports. Reports are grouped by subject,
+    a decision callback picks the action for each subject, and the actions run concurrently.
+    The server already leaves resolved reports out of the queue, so the checkpoint only holds the
+    actions that were taken but whose reports are not resolved yet; a restarted run resolves those
+    first instead of taking the actions again.
+    Reports are grouped within one window at a time: reports on the same subject that fall in two
+    windows are decided separately and get two actions. Raise window if that matters.
+    '''
+    def __init__(self, decide, created_by, checkpoint_path='.cache/moderation_checkpoint.json',
+                 max_workers=4, rate=5, window=1000, client=None):
+        """
+        Args:
+            decide (callable): Called as decide(subject, reports). Returns None to leave the subject alone,
+                or a dict with the 'action' (e.g. 'com.atproto.admin.defs#takedown') and 'reason' to apply.
+            created_by (str): The DID of the moderator the actions are recorded against.
+            checkpoint_path (str, optional): Where in-flight actions are stored. Defaults to '.cache/moderation_checkpoint.json'.
+            max_workers (int, optional): Number of subjects handled concurrently. Defaults to 4.
+            rate (float, optional): Requests per second across all workers. Defaults to 5.
+            window (int, optional): Number of reports read and grouped before actions start. Defaults to 1000.
+            client (Admin, optional): The Admin instance to use. Defaults to a new Admin().
+        """
+        self.decide = decide
+        self.created_by = created_by
+        self.checkpoint_path = checkpoint_path
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.window = window
+        self.client = client or Admin()
+        self.lock = threading.Lock()
+        # Action ID -> IDs of the reports it still has to resolve.
+        self.in_flight = self._load_checkpoint()
+
+    def unresolved_reports(self):
+        """
+        Stream every unresolved report that is not waiting on an action this worker already took.
+        Returns:
+            generator: Report views.
+        """
+        with self.lock:
+            pending = {report_id for report_ids in self.in_flight.values() for report_id in report_ids}
+        for report in paginate(self.client.getModerationReports, 'reports', resolved=False, limit=100):
+            if report['id'] not in pending:
+                yield report
+
+    def run(self, max_reports=None):
+        """
+        Process the queue until it is empty.
+        Usage:
+            def decide(subject, reports):
+                if len(reports) >= 3:
+                    return {"action": "com.atproto.admin.defs#flag", "reason": "Multiple reports"}
+            summary = ModerationWorker(decide, created_by="did:example:mod").run()
+            print(summary)
+        Args:
+            max_reports (int, optional): Stop after reading this many reports. Defaults to None (the whole queue).
+        Returns:
+            dict: Counts of 'actions' taken, 'resolved' reports, 'skipped' and 'failed' subjects, plus the 'errors'.
+        """
+        summary = {'actions': 0, 'resolved': 0, 'skipped': 0, 'failed': 0, 'errors': []}
+        with self.lock:
+            interrupted = list(self.in_flight.items())
+        for (action_id, report_ids), _, error in run_concurrently(self._resume, interrupted, self.max_workers):
+            if error is not None:
+                summary['errors'].append({'action': action_id, 'error': str(error)})
+            else:
+                summary['resolved'] += len(report_ids)
+
+        reports = self.unresolved_reports()
+        if max_reports is not None:
+            reports = islice(reports, max_reports)
+        while True:
+            window = list(islice(reports, self.window))
+            if not window:
+                return summary
+            groups = group_by_subject(window).values()
+            for (subject, group), result, error in run_concurrently(self._handle, groups, self.max_workers):
+                if error is not None:
+                    summary['failed'] += 1
+                    summary['errors'].append({'subject': subject, 'error': str(error)})
+                elif result is None:
+                    summary['skipped'] += 1
+                else:
+                    summary['actions'] += 1
+                    summary['resolved'] += len(group)
+
+    def _handle(self, group):
+        subject, reports = group
+        decision = self.decide(subject, reports)
+        if decision is None:
+            return None
+        self.rate_limiter.acquire()
+        action = self.client.takeModerationAction(decision['action'], subject, decision['reason'], self.created_by)
+        if not action or 'id' not in action:
+            raise Exception(f"Error taking moderation action: {action}")
+        report_ids = [report['id'] for report in reports]
+        with self.lock:
+            self.in_flight[str(action['id'])] = report_ids
+            self._save_checkpoint()
+        self._resolve(action['id'], report_ids)
+        return action
+
+    def _resume(self, item):
+        action_id, report_ids = item
+        self._resolve(int(action_id), report_ids)
+
+    def _resolve(self, action_id, report_ids):
+        self.rate_limiter.acquire()
+        resolved = self.client.resolveModerationReports(action_id, report_ids, self.created_by)
+        if resolved and 'error' in resolved:
+            raise Exception(f"Error resolving reports {report_ids}: {resolved}")
+        with self.lock:
+            self.in_flight.pop(str(action_id), None)
+            self._save_checkpoint()
+
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path, 'r') as f:
+            return json.load(f).get('in_flight', {})
+
+    def _save_checkpoint(self):
+        os.makedirs(os.path.dirname(self.checkpoint_path) or '.', exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'in_flight': self.in_flight}, f)
+        os.replace(tmp_path, self.checkpoint_path)
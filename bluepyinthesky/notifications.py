@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+from .app import App
+from .pagination import iter_pages
+
+
+class NotificationPoller:
+    '''
+    Polls notifications cheaply: getUnreadCount first, and listNotifications only when it is non-zero,
+    paging just until already-seen items. Each batch is marked seen with a single updateSeen call.
+    The interval shrinks while notifications keep arriving and backs off while the account is quiet.
+    '''
+    def __init__(self, handler, min_interval=5, max_interval=300, backoff=2.0, page_size=50,
+                 state_path='.cache/notifications.json', client=None):
+        """
+        Args:
+            handler (callable): Called with each batch of new notifications, oldest first. If it raises,
+                the batch is not marked seen and is delivered again on the next poll.
+            min_interval (float, optional): Seconds between polls while busy. Defaults to 5.
+            max_interval (float, optional): Longest wait between polls while quiet. Defaults to 300.
+            backoff (float, optional): Factor the interval grows by after each empty poll. Defaults to 2.0.
+            page_size (int, optional): Notifications requested per page. Defaults to 50.
+            state_path (str, optional): JSON file remembering the newest seen notification across restarts,
+                or None to keep it in memory only. Defaults to '.cache/notifications.json'.
+            client (App, optional): The App instance to use. Defaults to a new App().
+        """
+        self.client = client or App()
+        self.handler = handler
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.page_size = page_size
+        self.state_path = state_path
+        self.interval = min_interval
+        self.stopped = threading.Event()
+        self.state = self._load_state()
+
+    def poll(self):
+        """
+        Deliver the notifications that arrived since the last poll, if any.
+        Usage:
+            poller = NotificationPoller(lambda batch: print(len(batch)))
+            poller.poll()
+        Returns:
+            list: The new notifications handed to the handler, oldest first.
+        """
+        unread = self.client.getUnreadCount()
+        if 'error' in unread:
+            raise Exception(f"Error getting unread count: {unread['error']}, {unread.get('message')}")
+        if not unread.get('count'):
+            self._adapt(False)
+            return []
+
+        seen_at = self.state['seen_at']
+        seen_uris = set(self.state['uris'])
+        new = []
+        reached = False
+        for page in iter_pages(self.client.listNotifications, limit=self.page_size):
+            for notification in page.get('notifications') or []:
+                indexed_at = notification['indexedAt']
+                # isRead means the server has it before the last updateSeen, from this poller or any other client.
+                if notification.get('isRead') or (seen_at and (
+                        indexed_at < seen_at or (indexed_at == seen_at and notification['uri'] in seen_uris))):
+                    reached = True
+                    break
+                new.append(notification)
+            if reached:
+                break
+
+        new.reverse()
+        if new:
+            self.handler(new)
+        # Marked seen even when everything listed was already handled, or the unread count would
+        # stay non-zero and every later poll would list again.
+        newest = max([seen_at or ''] + [notification['indexedAt'] for notification in new])
+        if newest:
+            self.client.updateSeen(newest)
+            uris = [n['uri'] for n in new if n['indexedAt'] == newest]
+            self.state = {'seen_at': newest, 'uris': uris if newest != seen_at else sorted(seen_uris | set(uris))}
+            self._save_state()
+        self._adapt(bool(new))
+        return new
+
+    def run(self, max_polls=None, on_error=None):
+        """
+        Poll until stop() is called, sleeping the adaptive interval in between. A poll that fails
+        (the handler raising, a network or server error) does not end the loop: the interval backs
+        off and the undelivered batch is retried on the next poll.
+        Args:
+            max_polls (int, optional): Stop after this many polls. Defaults to None.
+            on_error (callable, optional): Called with the exception of each failed poll. Defaults to
+                None (the error is printed).
+        """
+        polls = 0
+        while not self.stopped.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self._adapt(False)
+                if on_error is not None:
+                    on_error(e)
+                else:
+                    print(f"Notification poll failed: {e}")
+            polls += 1
+            if max_polls is not None and polls >= max_polls:
+                return
+            self.stopped.wait(self.interval)
+
+    def stop(self):
+        self.stopped.set()
+
+    def _adapt(self, active):
+        if active:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+
+    def _load_state(self):
+        if self.state_path and os.path.exists(self.state_path):
+            with open(self.state_path) as f:
+                return json.load(f)
+        return {'seen_at': None, 'uris': []}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
@@ -0,0 +1,43 @@
+def paginate(method, key, *args, max_pages=None, **kwargs):
+    """
+    Follow the cursors of a paginated endpoint and yield every item.
+    Usage:
+        app = App()
+        for follower in paginate(app.getFollowers, 'followers', actor="robcerda.com", limit=100):
+            print(follower['did'])
+    Args:
+        method (callable): A client method that accepts a cursor keyword and returns a dict.
+        key (str): The key of the list of items in each page, e.g. 'followers' or 'feed'.
+        max_pages (int, optional): Stop after this many pages. Defaults to None (all pages).
+        *args, **kwargs: Passed through to method on every call.
+    Returns:
+        generator: The items of every page, in order.
+    """
+    for page in iter_pages(method, *args, max_pages=max_pages, **kwargs):
+        yield from page.get(key) or []
+
+
+def iter_pages(method, *args, max_pages=None, cursor=None, **kwargs):
+    """
+    Follow the cursors of a paginated endpoint and yield every page.
+    Args:
+        method (callable): A client method that accepts a cursor keyword and returns a dict.
+        max_pages (int, optional): Stop after this many pages. Defaults to None (all pages).
+        cursor (str, optional): The cursor to start from. Defaults to None (first page).
+        *args, **kwargs: Passed through to method on every call.
+    Returns:
+        generator: The raw JSON response of every page.
+    """
+    pages = 0
+    while True:
+        page = method(*args, cursor=cursor, **kwargs)
+        if page is None:
+            return
+        if 'error' in page:
+            raise Exception(f"Error paginating {getattr(method, '__name__', method)}: {page['error']}, {page.get('message')}")
+        yield page
+        pages += 1
+        next_cursor = page.get('cursor')
+        if not next_cursor or next_cursor == cursor or (max_pages is not None and pages >= max_pages):
+            return
+        cursor = next_cursor
@@ -1,21 +1,18 @@
-import requests
-from .auth import Auth
+from .auth import Client
 import json
 
-class Repo:
+class Repo(Client):
     '''
     https://github.com/bluesky-social/atproto/tree/main/lexicons/com/atproto/repo
     '''
-    def __init__(self):
-        self.url = Auth().url
-        self.encrypted_credentials = Auth().encrypted_credentials
-        self.decryption_key_path = Auth().decryption_key_path
-        self.decryption_key = Auth().decryption_key
-        self.access_jwt = Auth().access_jwt
-        self.refresh_jwt = Auth().refresh_jwt
-
-        self.credentials = Auth()._read_and_decrypt_credentials()
-        self.refreshSession = Auth().refreshSession
+    def __init__(self, auth=None, router=None):
+        """
+        Args:
+            auth (Auth, optional): The session to use. Defaults to a new Auth().
+            router (PdsRouter, optional): Sends getRecord/listRecords to the PDS hosting each repo. Defaults to None.
+        """
+        super().__init__(auth)
+        self.router = router
 
     def applyWrites(self, repo, writes, validate=True, swapCommit=None):
         """
@@ -43,14 +40,15 @@ class Repo:
             "writes": writes,
             "swapCommit": swapCommit
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
-        else:
-            json_response = response.json()
-            return json_response
+            response = self.http.post(request_url, headers=headers, json=json_data)
+        if not response.content:
+            return {}
+        json_response = response.json()
+        return json_response
         
     def create_record(self, repo, collection, record, rkey=None, validate=True, swap_commit=None):
         """
@@ -82,11 +80,11 @@ class Repo:
             json_data["rkey"] = rkey
         if swap_commit:
             json_data["swapCommit"] = swap_commit
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         else:
             json_response = response.json()
             return {"uri": json_response["uri"], "cid": json_response["cid"]}
@@ -115,11 +113,11 @@ class Repo:
             "swapRecord": swapRecord,
             "swapCommit": swapCommit
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         return response.content
 
     def describeRepo(self, repo):
@@ -138,11 +136,11 @@ class Repo:
         json_data = {
             "repo": repo
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         return response.content
 
     def getRecord(self, did, collection, rkey, commit=None):
@@ -156,25 +154,22 @@ class Repo:
         Returns:
             The response content in bytes.
         """
-        request_url = f"{self.url}/com.atproto.repo.getRecord"
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f"Bearer {self.access_jwt}"
-        }
-        json_data = {
+        base_url, http, headers = self._route(did)
+        request_url = f"{base_url}/com.atproto.repo.getRecord"
+        params = {
             "repo": did,
             "collection": collection,
             "rkey": rkey,
             "cid": commit
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
-        if response.status_code == 401:  # Unauthorized
+        response = http.get(request_url, headers=headers, params=params)
+        if response.status_code == 401 and 'Authorization' in headers:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = http.get(request_url, headers=headers, params=params)
         return response.content
 
-    def listRecords(self, did, collection, limit=50, rkeyStart=None, rkeyEnd=None, reverse=False):
+    def listRecords(self, did, collection, limit=50, rkeyStart=None, rkeyEnd=None, reverse=False, cursor=None):
         """
         List a range of records in a collection.
         Args:
@@ -184,27 +179,26 @@ class Repo:
             rkeyStart (str): The lowest sort-ordered rkey to start from (exclusive).
             rkeyEnd (str): The highest sort-ordered rkey to stop at (exclusive).
             reverse (bool): Reverse the order of the returned records? Default is False.
+            cursor (str): The cursor to use for pagination. Optional.
         Returns:
             The response content in bytes.
         """
-        request_url = f"{self.url}/com.atproto.sync.listRecords"
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f"Bearer {self.access_jwt}"
-        }
-        json_data = {
+        base_url, http, headers = self._route(did)
+        request_url = f"{base_url}/com.atproto.repo.listRecords"
+        params = {
             "repo": did,
             "collection": collection,
             "limit": limit,
             "rkeyStart": rkeyStart,
             "rkeyEnd": rkeyEnd,
-            "reverse": reverse
+            "reverse": 'true' if reverse else 'false',
+            "cursor": cursor
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
-        if response.status_code == 401:  # Unauthorized
+        response = http.get(request_url, headers=headers, params=params)
+        if response.status_code == 401 and 'Authorization' in headers:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = http.get(request_url, headers=headers, params=params)
         return response.content
 
     def putRecord(self, repo, collection, rkey, record, validate=True, swapRecord=None, swapCommit=None):
@@ -240,11 +234,11 @@ class Repo:
             "swapRecord": swapRecord,
             "swapCommit": swapCommit
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         else:
             json_response = response.json()
             if "error" in json_response:
@@ -253,11 +247,12 @@ class Repo:
             else:
                 return json_response
 
-    def uploadBlob(self, blob):
+    def uploadBlob(self, blob, mime_type=None):
         """
         Upload a new blob to be added to repo in a later request.
         Args:
             blob (bytes): The blob data to upload.
+            mime_type (str, optional): The MIME type of the blob, e.g. 'image/jpeg'. Defaults to None.
         Returns:
             The response content as a dictionary.
         """
@@ -265,9 +260,11 @@ class Repo:
         headers = {
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        response = requests.post(request_url, headers=headers, data=blob)
+        if mime_type:
+            headers['Content-Type'] = mime_type
+        response = self.http.post(request_url, headers=headers, data=blob)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, data=blob)
+            response = self.http.post(request_url, headers=headers, data=blob)
         return response.json()
\ No newline at end of file
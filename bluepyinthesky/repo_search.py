@@ -0,0 +1,85 @@
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import threading
+from .admin import Admin
+from .concurrency import RateLimiter
+from .pagination import iter_pages
+
+_DONE = object()
+
+
+class RepoSearch:
+    '''
+    Runs Admin.searchRepos for many terms at once, following every cursor, and streams the
+    merged results with each DID reported only once.
+    '''
+    def __init__(self, max_workers=8, rate=10, page_size=100, client=None):
+        """
+        Args:
+            max_workers (int, optional): Number of terms searched concurrently. Defaults to 8.
+            rate (float, optional): Requests per second across all terms. Defaults to 10.
+            page_size (int, optional): Results requested per page. Defaults to 100.
+            client (Admin, optional): The Admin instance to use. Defaults to a new Admin().
+        """
+        self.client = client or Admin()
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.page_size = page_size
+
+    def search(self, terms, max_pages=None):
+        """
+        Search every term and yield repos as soon as any term finds them.
+        Usage:
+            for repo in RepoSearch().search(["alice", "alice@example.com", "al1ce"]):
+                print(repo["did"], repo["handle"])
+        Args:
+            terms (iterable): The search terms.
+            max_pages (int, optional): Pages to follow per term. Defaults to None (all pages).
+        Returns:
+            generator: Repo views, deduplicated by DID.
+        """
+        terms = list(dict.fromkeys(terms))
+        results = queue.Queue(maxsize=self.max_workers * 4)
+        stop = threading.Event()
+        seen = set()
+
+        def run(term):
+            try:
+                for page in iter_pages(self._search_page, term, max_pages=max_pages):
+                    if stop.is_set():
+                        return
+                    results.put(page.get('repos') or [])
+            except Exception as e:
+                results.put(e)
+            finally:
+                results.put(_DONE)
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for term in terms:
+                pool.submit(run, term)
+            remaining = len(terms)
+            while remaining:
+                item = results.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    for repo in item:
+                        if repo['did'] not in seen:
+                            seen.add(repo['did'])
+                            yield repo
+        finally:
+            # The consumer may stop early; let the workers drain out instead of blocking on a full queue.
+            stop.set()
+            while True:
+                try:
+                    results.get_nowait()
+                except queue.Empty:
+                    break
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _search_page(self, term, cursor=None):
+        self.rate_limiter.acquire()
+        return self.client.searchRepos(term, limit=self.page_size, cursor=cursor)
@@ -0,0 +1,208 @@
+import threading
+from urllib.parse import unquote, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from .cache import TTLCache
+from .concurrency import run_concurrently
+from .identity import Identity
+
+PLC_DIRECTORY = 'https://plc.directory'
+
+# resolveHandle answers with one of these when the handle does not exist.
+NOT_FOUND_ERRORS = ('InvalidRequest', 'HandleNotFound')
+
+
+def normalize_handle(handle):
+    return handle.strip().lstrip('@').lower()
+
+
+class HandleResolver:
+    '''
+    Cached handle -> DID resolution on top of Identity.resolveHandle.
+    Handles that do not exist are cached too, for a shorter time, and concurrent
+    lookups of the same handle share one request.
+    '''
+    def __init__(self, ttl=3600, negative_ttl=300, maxsize=100000, max_workers=16, client=None):
+        """
+        Args:
+            ttl (float, optional): How long a resolved DID is reused, in seconds. Defaults to 3600.
+            negative_ttl (float, optional): How long a not-found result is reused, in seconds. Defaults to 300.
+            maxsize (int, optional): The maximum number of handles cached. Defaults to 100000.
+            max_workers (int, optional): Number of concurrent lookups in resolve_many. Defaults to 16.
+            client (Identity, optional): The Identity instance to use. Defaults to a new Identity().
+        """
+        self.client = client or Identity()
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_workers = max_workers
+        self.cache = TTLCache(ttl, maxsize)
+
+    def resolve(self, handle):
+        """
+        Resolve one handle.
+        Usage:
+            resolver = HandleResolver()
+            print(resolver.resolve("robcerda.com"))
+        Args:
+            handle (str): The handle, with or without a leading '@'.
+        Returns:
+            str: The DID, or None if the handle does not exist.
+        """
+        handle = normalize_handle(handle)
+        return self.cache.get_or_load(handle, lambda: self._lookup(handle),
+                                      ttl=lambda did: self.ttl if did else self.negative_ttl)
+
+    def resolve_many(self, handles, errors=None):
+        """
+        Resolve many handles concurrently. Cached and repeated handles cost no extra requests.
+        One failed lookup does not affect the others.
+        Usage:
+            errors = {}
+            dids = HandleResolver().resolve_many(["alice.bsky.social", "bob.bsky.social"], errors=errors)
+        Args:
+            handles (iterable): The handles to resolve.
+            errors (dict, optional): Filled with handle -> exception for every lookup that failed,
+                e.g. on a server error. Defaults to None.
+        Returns:
+            dict: handle (as given) -> DID, or None if the handle does not exist. Handles whose lookup
+                failed are left out.
+        """
+        handles = list(dict.fromkeys(handles))
+        results = {}
+        for handle, did, error in run_concurrently(self.resolve, handles, self.max_workers):
+            if error is not None:
+                if errors is not None:
+                    errors[handle] = error
+                continue
+            results[handle] = did
+        return results
+
+    def forget(self, handle):
+        self.cache.delete(normalize_handle(handle))
+
+    def _lookup(self, handle):
+        response = self.client.resolveHandle(handle)
+        if 'did' in response:
+            return response['did']
+        if response.get('error') in NOT_FOUND_ERRORS:
+            return None
+        # Anything else (rate limits, server errors) is not a fact about the handle, so it is not cached.
+        raise Exception(f"Error resolving handle {handle}: {response}")
+
+
+class DidResolver:
+    '''
+    Cached DID document resolution for did:plc (via the PLC directory) and did:web.
+    Failures are cached too, for a shorter time, so a DID that does not resolve is not
+    looked up again on every read.
+    '''
+    def __init__(self, ttl=3600, negative_ttl=60, maxsize=100000, plc_directory=PLC_DIRECTORY, timeout=10):
+        """
+        Args:
+            ttl (float, optional): How long a DID document is reused, in seconds. Defaults to 3600.
+            negative_ttl (float, optional): How long a failed resolution is reused, in seconds. Defaults to 60.
+            maxsize (int, optional): The maximum number of documents cached. Defaults to 100000.
+            plc_directory (str, optional): The PLC directory to query. Defaults to 'https://plc.directory'.
+            timeout (float, optional): Request timeout in seconds. Defaults to 10.
+        """
+        self.plc_directory = plc_directory
+        self.timeout = timeout
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(ttl, maxsize)
+        self.session = requests.Session()
+
+    def resolve(self, did):
+        """
+        Get the DID document of a DID.
+        Args:
+            did (str): A did:plc or did:web identifier.
+        Returns:
+            dict: The DID document.
+        """
+        result = self.cache.get_or_load(did, lambda: self._load(did),
+                                        ttl=lambda result: self.negative_ttl if isinstance(result, Exception) else None)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def pds_endpoint(self, did):
+        """
+        Get the URL of the PDS hosting a DID's repo, e.g. 'https://morel.us-east.host.bsky.network'.
+        Returns:
+            str: The service endpoint, or None if the document does not declare one.
+        """
+        for service in self.resolve(did).get('service') or []:
+            if service.get('id', '').endswith('#atproto_pds') or service.get('type') == 'AtprotoPersonalDataServer':
+                return service['serviceEndpoint'].rstrip('/')
+        return None
+
+    def _load(self, did):
+        try:
+            return self._fetch(did)
+        except Exception as e:
+            # Returned rather than raised so that the cache keeps it for negative_ttl.
+            return e
+
+    def _fetch(self, did):
+        if did.startswith('did:plc:'):
+            url = f"{self.plc_directory}/{did}"
+        elif did.startswith('did:web:'):
+            url = f"https://{unquote(did[len('did:web:'):])}/.well-known/did.json"
+        else:
+            raise ValueError(f"Unsupported DID method: {did}")
+        response = self.session.get(url, timeout=self.timeout)
+        if response.status_code != 200:
+            raise Exception(f"Error resolving {did}: {response.status_code}, {response.text}")
+        return response.json()
+
+
+class PdsRouter:
+    '''
+    Routes repo and sync reads straight to the PDS that hosts each DID, with a
+    connection pool per host. Pass it as the router of Repo or Sync.
+    '''
+    def __init__(self, default_url, did_resolver=None, pool_size=10):
+        """
+        Args:
+            default_url (str): The xrpc URL used when a DID's PDS cannot be determined, usually Auth().url.
+            did_resolver (DidResolver, optional): Resolves DID documents. Defaults to a new DidResolver().
+            pool_size (int, optional): Connections kept open per host. Defaults to 10.
+        """
+        self.default_url = default_url
+        self.did_resolver = did_resolver or DidResolver()
+        self.pool_size = pool_size
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def route(self, did):
+        """
+        Pick the xrpc URL and HTTP session to use for reads of a repo.
+        Usage:
+            router = PdsRouter(Auth().url)
+            url, session = router.route("did:plc:sg22gxlwhuxtkwd5owhrqrhb")
+        Args:
+            did (str): The DID of the repo. Handles fall back to the default URL.
+        Returns:
+            tuple: The xrpc base URL and a requests.Session bound to that host.
+        """
+        url = self.default_url
+        if did.startswith('did:'):
+            try:
+                endpoint = self.did_resolver.pds_endpoint(did)
+            except Exception:
+                endpoint = None
+            if endpoint:
+                url = f"{endpoint}/xrpc"
+        return url, self.session_for(url)
+
+    def session_for(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.sessions[host] = session
+            return session
@@ -0,0 +1,140 @@
+import re
+from .resolver import HandleResolver
+from .tlds import TLDS
+
+MENTION = 'app.bsky.richtext.facet#mention'
+LINK = 'app.bsky.richtext.facet#link'
+TAG = 'app.bsky.richtext.facet#tag'
+
+# Compiled once at import; the patterns follow the detection rules of the official clients, which
+# also require a bare domain (one without http:// or https://) to end in a known TLD.
+MENTION_REGEX = re.compile(r'(?:^|(?<=[\s(]))@([a-zA-Z0-9.-]+)\b')
+HANDLE_REGEX = re.compile(r'^([a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)+[a-zA-Z]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?$')
+URL_REGEX = re.compile(r'(?:^|(?<=[\s(]))(https?://\S+|[a-zA-Z][a-zA-Z0-9-]*(?:\.[a-zA-Z0-9-]+)*\.[a-zA-Z]{2,}(?:/\S*)?)')
+TAG_REGEX = re.compile(r'(?:^|(?<=\s))[#\uFF03]([^\s\u00AD\u2060\u200A\u200B\u200C\u200D\u20E2]+)')
+TRAILING_PUNCTUATION = re.compile(r'[.,;:!?\'"]+$')
+MAX_TAG_LENGTH = 64
+
+
+class ByteOffsets:
+    '''
+    Converts character indexes of one string to UTF-8 byte offsets, encoding only the text between
+    consecutive lookups. Lookups must come in increasing order.
+    '''
+    def __init__(self, text):
+        self.text = text
+        self.ascii = text.isascii()
+        self.char_index = 0
+        self.byte_index = 0
+
+    def __call__(self, char_index):
+        if self.ascii:
+            return char_index
+        self.byte_index += len(self.text[self.char_index:char_index].encode('utf-8'))
+        self.char_index = char_index
+        return self.byte_index
+
+
+def _strip_link(uri):
+    uri = TRAILING_PUNCTUATION.sub('', uri)
+    if uri.endswith(')') and '(' not in uri:
+        uri = uri[:-1]
+    return uri
+
+
+def find_spans(text):
+    """
+    Find mentions, links and hashtags in a post text, without any network calls.
+    Usage:
+        for kind, byte_start, byte_end, value in find_spans("hi @robcerda.com #python"):
+            print(kind, byte_start, byte_end, value)
+    Args:
+        text (str): The post text.
+    Returns:
+        list: (kind, byte_start, byte_end, value) tuples in text order, where kind is 'mention' (value is
+            the handle), 'link' (the full URL) or 'tag' (the tag without '#'). Offsets are UTF-8 byte offsets.
+    """
+    spans = []
+    for match in MENTION_REGEX.finditer(text):
+        handle = match.group(1).rstrip('.')
+        if HANDLE_REGEX.match(handle):
+            spans.append((match.start(), match.start() + 1 + len(handle), 'mention', handle.lower()))
+    for match in URL_REGEX.finditer(text):
+        uri = _strip_link(match.group(1))
+        host = uri.split('//', 1)[-1].split('/', 1)[0]
+        if '.' not in host:
+            continue
+        if not uri.startswith(('http://', 'https://')) and host.rsplit('.', 1)[-1].lower() not in TLDS:
+            continue
+        spans.append((match.start(1), match.start(1) + len(uri), 'link',
+                      uri if uri.startswith(('http://', 'https://')) else f"https://{uri}"))
+    for match in TAG_REGEX.finditer(text):
+        tag = TRAILING_PUNCTUATION.sub('', match.group(1))
+        if tag and not tag.isdigit() and len(tag) <= MAX_TAG_LENGTH:
+            spans.append((match.start(), match.start(1) + len(tag), 'tag', tag))
+
+    # Drop spans overlapping an earlier one, e.g. a domain inside an email-like mention.
+    spans.sort()
+    to_bytes = ByteOffsets(text)
+    results = []
+    end = -1
+    for start, stop, kind, value in spans:
+        if start < end:
+            continue
+        end = stop
+        results.append((kind, start, stop, value))
+    # Converted in a second pass so the offsets are looked up in increasing order.
+    return [(kind, to_bytes(start), to_bytes(stop), value) for kind, start, stop, value in results]
+
+
+class FacetBuilder:
+    '''
+    Builds app.bsky.richtext.facet lists locally. Mentioned handles are resolved to DIDs through a
+    HandleResolver, in one concurrent, cached batch per call.
+    '''
+    def __init__(self, resolver=None):
+        """
+        Args:
+            resolver (HandleResolver, optional): Resolves mentioned handles. Defaults to a new HandleResolver().
+        """
+        self.resolver = resolver or HandleResolver()
+
+    def facets(self, text):
+        """
+        The facets of one post text.
+        Usage:
+            facets = FacetBuilder().facets("Thanks @robcerda.com! https://example.com #python")
+        Args:
+            text (str): The post text.
+        Returns:
+            list: Facets, ready for the 'facets' field of an app.bsky.feed.post record. Mentions of
+                handles that do not resolve are left out.
+        """
+        return self.facets_many([text])[0]
+
+    def facets_many(self, texts):
+        """
+        The facets of many post texts, resolving every mentioned handle in a single batch.
+        Args:
+            texts (list): The post texts.
+        Returns:
+            list: One facet list per text.
+        """
+        all_spans = [find_spans(text) for text in texts]
+        handles = {value for spans in all_spans for kind, _, _, value in spans if kind == 'mention'}
+        dids = self.resolver.resolve_many(handles) if handles else {}
+        results = []
+        for spans in all_spans:
+            facets = []
+            for kind, byte_start, byte_end, value in spans:
+                if kind == 'mention':
+                    if not dids.get(value):
+                        continue
+                    feature = {'$type': MENTION, 'did': dids[value]}
+                elif kind == 'link':
+                    feature = {'$type': LINK, 'uri': value}
+                else:
+                    feature = {'$type': TAG, 'tag': value}
+                facets.append({'index': {'byteStart': byte_start, 'byteEnd': byte_end}, 'features': [feature]})
+            results.append(facets)
+        return results
@@ -1,22 +1,10 @@
-import requests
-from .auth import Auth
+from .auth import Client
 import json
 
-class Server:
+class Server(Client):
     '''
     https://github.com/bluesky-social/atproto/tree/main/lexicons/com/atproto/server
     '''
-    def __init__(self):
-        self.url = Auth().url
-        self.encrypted_credentials = Auth().encrypted_credentials
-        self.decryption_key_path = Auth().decryption_key_path
-        self.decryption_key = Auth().decryption_key
-        self.access_jwt = Auth().access_jwt
-        self.refresh_jwt = Auth().refresh_jwt
-
-        self.credentials = Auth()._read_and_decrypt_credentials()
-        self.refreshSession = Auth().refreshSession
-
     def createAccount(self, handle, email, password, invite_code=None, recovery_key=None):
         """
         Create an account.
@@ -43,11 +31,11 @@ class Server:
             request_data['inviteCode'] = invite_code
         if recovery_key:
             request_data['recoveryKey'] = recovery_key
-        response = requests.post(request_url, headers=headers, json=request_data)
+        response = self.http.post(request_url, headers=headers, json=request_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=request_data)
+            response = self.http.post(request_url, headers=headers, json=request_data)
         json_response = response.json()
         return json_response
 
@@ -70,11 +58,11 @@ class Server:
         }
         if for_account is not None:
             body["forAccount"] = for_account
-        response = requests.post(request_url, headers=headers, json=body)
+        response = self.http.post(request_url, headers=headers, json=body)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=body)
+            response = self.http.post(request_url, headers=headers, json=body)
         json_response = response.json()
         return json_response
 
@@ -89,6 +77,7 @@ class Server:
             code_count (int, optional): The number of invite codes to create. Defaults to 1.
             use_count (int, required): The number of times each invite code can be used.
             for_account (str, optional): The DID of the account that the invite codes are for. Defaults to None.
+                Sent as the one-element forAccounts list the endpoint expects.
         Returns:
             dict: The JSON response from the API.
         """
@@ -101,12 +90,12 @@ class Server:
             'useCount': use_count
         }
         if for_account:
-            params['forAccount'] = for_account
-        response = requests.post(f"{self.url}/com.atproto.server.createInviteCodes", headers=headers, json=params)
+            params['forAccounts'] = [for_account]
+        response = self.http.post(f"{self.url}/com.atproto.server.createInviteCodes", headers=headers, json=params)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(f"{self.url}/com.atproto.server.createInviteCodes", headers=headers, json=params)
+            response = self.http.post(f"{self.url}/com.atproto.server.createInviteCodes", headers=headers, json=params)
         json_response = response.json()
         return json_response
 
@@ -130,11 +119,11 @@ class Server:
             "password": password,
             "token": token
         }
-        response = requests.post(request_url, headers=headers, json=data)
+        response = self.http.post(request_url, headers=headers, json=data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=data)
+            response = self.http.post(request_url, headers=headers, json=data)
         else:
             json_response = response.json()
             return json_response
@@ -145,11 +134,11 @@ class Server:
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        response = requests.post(endpoint_url, headers=headers)
+        response = self.http.post(endpoint_url, headers=headers)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(endpoint_url, headers=headers)
+            response = self.http.post(endpoint_url, headers=headers)
         return response.json()
     
     def describeServer(self):
@@ -168,11 +157,11 @@ class Server:
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        response = requests.get(request_url, headers=headers)
+        response = self.http.get(request_url, headers=headers)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers)
+            response = self.http.get(request_url, headers=headers)
 
         json_response = response.json()
         return json_response
@@ -194,11 +183,11 @@ class Server:
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        response = requests.get(request_url, headers=headers)
+        response = self.http.get(request_url, headers=headers)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers)
+            response = self.http.get(request_url, headers=headers)
         else:
             json_response = response.json()
             return json_response
@@ -209,11 +198,11 @@ class Server:
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        response = requests.post(endpoint, headers=headers)
+        response = self.http.post(endpoint, headers=headers)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(endpoint, headers=headers)
+            response = self.http.post(endpoint, headers=headers)
         json_response = response.json()
         return json_response
         
@@ -233,11 +222,11 @@ class Server:
         data = {
             'email': email
         }
-        response = requests.post(request_url, headers=headers, json=data)
+        response = self.http.post(request_url, headers=headers, json=data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=data)
+            response = self.http.post(request_url, headers=headers, json=data)
         else:
             json_response = response.json()
             return json_response
@@ -264,11 +253,11 @@ class Server:
             "token": token,
             "password": password
         }
-        response = requests.post(request_url, headers=headers, json=data)
+        response = self.http.post(request_url, headers=headers, json=data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=data)
+            response = self.http.post(request_url, headers=headers, json=data)
         else:
             json_response = response.json()
             return json_response
@@ -289,16 +278,15 @@ class Server:
         Returns:
             dict: The JSON response from the API.
         """
-        request_url = f"{self.url}/com.atproto.server.getAccountInviteCodes?includeUsed={include_used}&createAvailable={create_available}"
+        request_url = f"{self.url}/com.atproto.server.getAccountInviteCodes?includeUsed={str(include_used).lower()}&createAvailable={str(create_available).lower()}"
         headers = {
             'Content-Type': 'application/json',
             'Authorization': f"Bearer {self.access_jwt}"
         }
-        response = requests.get(request_url, headers=headers, json=data)
+        response = self.http.get(request_url, headers=headers, json=data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, json=data)
-        else:
-            json_response = response.json()
-            return json_response
\ No newline at end of file
+            response = self.http.get(request_url, headers=headers, json=data)
+        json_response = response.json()
+        return json_response
\ No newline at end of file
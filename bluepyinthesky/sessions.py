@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from .app import App
+from .auth import Auth
+
+STRATEGIES = ('least_loaded', 'round_robin')
+
+
+def is_rate_limited(result):
+    """
+    Whether a response dict or an exception raised by an App method reports a rate limit.
+    """
+    if isinstance(result, dict):
+        return result.get('error') == 'RateLimitExceeded'
+    if isinstance(result, Exception):
+        message = str(result)
+        return 'RateLimitExceeded' in message or ': 429,' in message
+    return False
+
+
+class PooledAccount:
+    def __init__(self, app):
+        self.app = app
+        self.in_flight = 0
+        self.calls = 0
+        self.limited_until = 0.0
+
+
+class SessionPool:
+    '''
+    Spreads read calls over several accounts, each with its own Auth session and token lifecycle,
+    so throughput is not capped by one account's rate limit. An account that gets rate-limited
+    is taken out of rotation for a cooldown and the call is retried on another one.
+    '''
+    def __init__(self, accounts, strategy='least_loaded', cooldown=60, retries=3, endpoints=None):
+        """
+        Args:
+            accounts (list): Encrypted credentials (from tools/crypto_helper.py), or Auth instances, one per account.
+            strategy (str, optional): 'least_loaded' (fewest calls in flight) or 'round_robin'. Defaults to 'least_loaded'.
+            cooldown (float, optional): Seconds a rate-limited account stays out of rotation. Defaults to 60.
+            retries (int, optional): Further attempts, on other accounts, after a rate-limited call. Defaults to 3.
+            endpoints (list, optional): xrpc URLs passed to each new Auth. Defaults to None.
+        """
+        if not accounts:
+            raise ValueError("At least one account is required")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Invalid strategy: {strategy}. Allowed values: {', '.join(STRATEGIES)}")
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.retries = retries
+        self.lock = threading.Lock()
+        self.next_index = 0
+
+        def login(account):
+            auth = account if isinstance(account, Auth) else Auth(endpoints, encrypted_credentials=account)
+            return PooledAccount(App(auth=auth))
+
+        # Logging in is a network round trip per account, so do them side by side.
+        with ThreadPoolExecutor(max_workers=min(len(accounts), 8)) as executor:
+            self.accounts = list(executor.map(login, accounts))
+
+    def call(self, method, *args, **kwargs):
+        """
+        Call an App method on the next available account.
+        Usage:
+            pool = SessionPool([b'gAAAAA...', b'gAAAAA...'])
+            feed = pool.call('getAuthorFeed', actor="robcerda.com", limit=100)
+        Args:
+            method (str): The name of the App method, e.g. 'getProfiles'.
+            *args, **kwargs: Passed on to the method.
+        Returns:
+            The method's return value.
+        """
+        for attempt in range(self.retries + 1):
+            account = self._acquire()
+            try:
+                result = getattr(account.app, method)(*args, **kwargs)
+            except Exception as e:
+                if not is_rate_limited(e) or attempt == self.retries:
+                    raise
+                self._rate_limited(account)
+                continue
+            finally:
+                self._release(account)
+            if not is_rate_limited(result) or attempt == self.retries:
+                return result
+            self._rate_limited(account)
+
+    def getAuthorFeed(self, actor, limit=50, cursor=None):
+        return self.call('getAuthorFeed', actor, limit=limit, cursor=cursor)
+
+    def getFollowers(self, actor, limit=50, cursor=None):
+        return self.call('getFollowers', actor, limit=limit, cursor=cursor)
+
+    def getFollows(self, actor, limit=50, cursor=None):
+        return self.call('getFollows', actor, limit=limit, cursor=cursor)
+
+    def getLikes(self, uri, cid=None, limit=50, cursor=None):
+        return self.call('getLikes', uri, cid=cid, limit=limit, cursor=cursor)
+
+    def getRepostedBy(self, uri, cid=None, limit=50, cursor=None):
+        return self.call('getRepostedBy', uri, cid=cid, limit=limit, cursor=cursor)
+
+    def getProfiles(self, actors):
+        return self.call('getProfiles', actors)
+
+    def available(self):
+        """
+        The DIDs of the accounts currently in rotation.
+        """
+        now = time.monotonic()
+        with self.lock:
+            return [account.app.did for account in self.accounts if account.limited_until <= now]
+
+    def _acquire(self):
+        while True:
+            now = time.monotonic()
+            with self.lock:
+                ready = [account for account in self.accounts if account.limited_until <= now]
+                if ready:
+                    if self.strategy == 'round_robin':
+                        account = ready[self.next_index % len(ready)]
+                        self.next_index += 1
+                    else:
+                        account = min(ready, key=lambda a: (a.in_flight, a.calls))
+                    account.in_flight += 1
+                    account.calls += 1
+                    return account
+                wait_for = min(account.limited_until for account in self.accounts) - now
+            # Every account is cooling down: wait for the first one to come back.
+            time.sleep(max(wait_for, 0))
+
+    def _release(self, account):
+        with self.lock:
+            account.in_flight -= 1
+
+    def _rate_limited(self, account):
+        with self.lock:
+            account.limited_until = time.monotonic() + self.cooldown
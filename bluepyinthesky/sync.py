@@ -1,21 +1,18 @@
-import requests
-from .auth import Auth
+from .auth import Client
 import json
 
-class Sync:
+class Sync(Client):
     '''
     https://github.com/bluesky-social/atproto/tree/main/lexicons/com/atproto/sync  
     '''
-    def __init__(self):
-        self.url = Auth().url
-        self.encrypted_credentials = Auth().encrypted_credentials
-        self.decryption_key_path = Auth().decryption_key_path
-        self.decryption_key = Auth().decryption_key
-        self.access_jwt = Auth().access_jwt
-        self.refresh_jwt = Auth().refresh_jwt
-
-        self.credentials = Auth()._read_and_decrypt_credentials()
-        self.refreshSession = Auth().refreshSession
+    def __init__(self, auth=None, router=None):
+        """
+        Args:
+            auth (Auth, optional): The session to use. Defaults to a new Auth().
+            router (PdsRouter, optional): Sends getRepo/getBlob to the PDS hosting each repo. Defaults to None.
+        """
+        super().__init__(auth)
+        self.router = router
 
     def getBlob(self, repo_did, blob_cid):
         """
@@ -26,15 +23,18 @@ class Sync:
         Returns:
             bytes: The contents of the blob.
         """
-        request_url = f"{self.url}/com.atproto.sync.getBlob?did={repo_did}&cid={blob_cid}"
-        headers = {'Authorization': f"Bearer {self.access_jwt}"}
-        response = requests.get(request_url, headers=headers)
-        if response.status_code == 401:  # Unauthorized
+        base_url, http, headers = self._route(repo_did)
+        request_url = f"{base_url}/com.atproto.sync.getBlob"
+        params = {
+            "did": repo_did,
+            "cid": blob_cid
+        }
+        response = http.get(request_url, headers=headers, params=params)
+        if response.status_code == 401 and 'Authorization' in headers:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers)
-        else:
-            return response.content
+            response = http.get(request_url, headers=headers, params=params)
+        return response.content
 
     def getBlocks(self, did, cids):
         """
@@ -53,11 +53,11 @@ class Sync:
             "did": did,
             "cids": cids
         }
-        response = requests.get(request_url, headers=headers, params=params)
+        response = self.http.get(request_url, headers=headers, params=params)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=params)
+            response = self.http.get(request_url, headers=headers, params=params)
         else:
             return response.content
 
@@ -81,11 +81,11 @@ class Sync:
         }
         if commit:
             json_data['commit'] = commit
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         else:
             return response.content
 
@@ -112,11 +112,11 @@ class Sync:
             json_data["latest"] = latest
         if earliest:
             json_data["earliest"] = earliest
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         else:
             json_response = response.json()
             return json_response
@@ -137,11 +137,11 @@ class Sync:
         json_data = {
             "did": did
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         else:
             json_response = response.json()
             return json_response
@@ -168,11 +168,11 @@ class Sync:
             "rkey": rkey,
             "commit": commit
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         return response.content
 
     def getRepo(self, did, earliest=None, latest=None):
@@ -183,26 +183,21 @@ class Sync:
             earliest (str, optional): The earliest commit in the commit range (not inclusive).
             latest (str, optional): The latest commit in the commit range (inclusive).
         Returns:
-            dict: The response from the API.
+            bytes: The CAR file of the repo.
         """
-        request_url = f"{self.url}/com.atproto.sync.getRepo"
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': f"Bearer {self.access_jwt}"
-        }
+        base_url, http, headers = self._route(did)
+        request_url = f"{base_url}/com.atproto.sync.getRepo"
         json_data = {
             "did": did,
             "earliest": earliest,
             "latest": latest
         }
-        response = requests.get(request_url, headers=headers, params=json_data)
-        if response.status_code == 401:  # Unauthorized
+        response = http.get(request_url, headers=headers, params=json_data)
+        if response.status_code == 401 and 'Authorization' in headers:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.get(request_url, headers=headers, params=json_data)
-        else:
-            response_content = response.text()
-            return response_content
+            response = http.get(request_url, headers=headers, params=json_data)
+        return response.content
 
     def listBlobs(self, did, latest, earliest):
         """
@@ -224,11 +219,11 @@ class Sync:
             "latest": latest,
             "earliest": earliest
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         else:
             json_response = response.json()
             return json_response
@@ -248,11 +243,11 @@ class Sync:
             'Authorization': f"Bearer {self.access_jwt}"
         }
         json_data = {"hostname": hostname}
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         else:
             json_response = response.json()
             return json_response
@@ -274,11 +269,11 @@ class Sync:
         json_data = {
             "hostname": hostname
         }
-        response = requests.post(request_url, headers=headers, json=json_data)
+        response = self.http.post(request_url, headers=headers, json=json_data)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data)
+            response = self.http.post(request_url, headers=headers, json=json_data)
         else:
             json_response = response.json()
             return json_response
@@ -299,10 +294,10 @@ class Sync:
         json_data = {
             "cursor": cursor
         }
-        response = requests.post(request_url, headers=headers, json=json_data, stream=True)
+        response = self.http.post(request_url, headers=headers, json=json_data, stream=True)
         if response.status_code == 401:  # Unauthorized
             self.refreshSession()
             headers['Authorization'] = f"Bearer {self.access_jwt}"
-            response = requests.post(request_url, headers=headers, json=json_data, stream=True)
+            response = self.http.post(request_url, headers=headers, json=json_data, stream=True)
         else:
             return response.content
\ No newline at end of file
@@ -0,0 +1,166 @@
+import numpy as np
+from .app import App
+from .cache import TTLCache
+from .concurrency import RateLimiter, run_concurrently
+
+THREAD_VIEW = 'app.bsky.feed.defs#threadViewPost'
+
+
+class Thread:
+    '''
+    A flattened reply tree. Node i is uris[i]; parents[i] is the index of the post it replies to,
+    or -1 for the root. Nodes are stored parents-first, so parents[i] < i for every reply.
+    '''
+    def __init__(self, uris, parents, posts=None, failed=None):
+        """
+        Args:
+            uris (list): The URI of every post, indexed by node.
+            parents (numpy.ndarray): int32 parent index of every node, -1 for the root.
+            posts (list, optional): The post view of every node, if they were kept. Defaults to None.
+            failed (dict, optional): Node index -> error, for nodes whose cut-off replies could not be
+                loaded. Defaults to None (none failed).
+        """
+        self.uris = uris
+        self.parents = parents
+        self.posts = posts
+        self.failed = failed or {}
+        self.indexes = {uri: i for i, uri in enumerate(uris)}
+        self.child_indptr = None
+        self.child_indices = None
+
+    def __len__(self):
+        return len(self.uris)
+
+    def index(self, uri):
+        return self.indexes[uri]
+
+    def children(self, index):
+        """
+        The node indexes of the direct replies to a node.
+        """
+        if self.child_indptr is None:
+            # CSR children lists, built once from the parent array.
+            order = np.argsort(self.parents[1:], kind='stable').astype(np.int32) + 1
+            counts = np.bincount(self.parents[1:], minlength=len(self))
+            self.child_indptr = np.concatenate([[0], np.cumsum(counts)])
+            self.child_indices = order
+        return self.child_indices[self.child_indptr[index]:self.child_indptr[index + 1]]
+
+    def depths(self):
+        """
+        The depth of every node below the root (the root is 0).
+        """
+        depths = np.zeros(len(self), dtype=np.int32)
+        # Parents come before their replies, so one forward pass is enough.
+        for i in range(1, len(self)):
+            depths[i] = depths[self.parents[i]] + 1
+        return depths
+
+    def subtree_sizes(self):
+        """
+        The number of posts in the subtree of every node, itself included.
+        """
+        sizes = np.ones(len(self), dtype=np.int32)
+        for i in range(len(self) - 1, 0, -1):
+            sizes[self.parents[i]] += sizes[i]
+        return sizes
+
+
+class ThreadLoader:
+    '''
+    Loads complete reply trees with getPostThread. Branches the server cut off at the depth limit are
+    expanded concurrently with further getPostThread calls on their leaves, round by round, and the
+    result is flattened into a Thread. Fetched subthreads are cached by URI for a short TTL.
+    '''
+    def __init__(self, depth=20, max_workers=8, rate=10, ttl=300, keep_posts=True, client=None):
+        """
+        Args:
+            depth (int, optional): The depth requested per getPostThread call. Defaults to 20.
+            max_workers (int, optional): Number of branches expanded at once. Defaults to 8.
+            rate (float, optional): Requests per second across all workers. Defaults to 10.
+            ttl (float, optional): How long a fetched subthread is reused, in seconds. Defaults to 300.
+            keep_posts (bool, optional): Keep each post view in Thread.posts, not just URIs. Defaults to True.
+            client (App, optional): The App instance to use. Defaults to a new App().
+        """
+        self.client = client or App()
+        self.depth = depth
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate)
+        self.keep_posts = keep_posts
+        self.cache = TTLCache(ttl)
+
+    def load(self, uri, from_root=True):
+        """
+        Load every reply of a thread.
+        Usage:
+            thread = ThreadLoader().load("at://did:plc:sg22gxlwhuxtkwd5owhrqrhb/app.bsky.feed.post/3k2a4b")
+            print(len(thread), thread.depths().max())
+        Args:
+            uri (str): The URI of any post in the thread.
+            from_root (bool, optional): Start from the thread's root post rather than uri. Defaults to True.
+        Returns:
+            Thread: The flattened tree. A branch that could not be expanded (e.g. a reply deleted or blocked
+                since the previous round) is kept without its replies and listed in Thread.failed.
+        """
+        node = self._subthread(uri)
+        if from_root:
+            root = ((node['post'].get('record') or {}).get('reply') or {}).get('root', {}).get('uri')
+            if root and root != uri:
+                node = self._subthread(root)
+
+        uris = []
+        parents = []
+        posts = [] if self.keep_posts else None
+        failed = {}
+        pending = self._flatten(node, -1, uris, parents, posts)
+        # Each round fetches the cut-off branches found in the previous one.
+        while pending:
+            found = []
+            for (index, branch_uri), subthread, error in run_concurrently(self._expand, pending, self.max_workers):
+                if error is not None:
+                    failed[index] = error
+                    continue
+                found += self._flatten(subthread, index, uris, parents, posts, attach=True)
+            pending = found
+        return Thread(uris, np.array(parents, dtype=np.int32), posts, failed)
+
+    def forget(self, uri):
+        self.cache.delete(uri)
+
+    def _expand(self, leaf):
+        return self._subthread(leaf[1])
+
+    def _subthread(self, uri):
+        def fetch():
+            self.rate_limiter.acquire()
+            thread = self.client.getPostThread(uri, depth=self.depth, parent_height=0)['thread']
+            if thread.get('$type', THREAD_VIEW) != THREAD_VIEW:
+                raise Exception(f"Thread not available: {uri} ({thread.get('$type')})")
+            return thread
+        return self.cache.get_or_load(uri, fetch)
+
+    def _flatten(self, node, parent, uris, parents, posts, attach=False):
+        """
+        Append node's subtree, parents first. With attach, node itself is already stored at index parent
+        and only its replies are added. Returns the (index, uri) of nodes whose replies were cut off.
+        """
+        truncated = []
+        stack = [(node, parent, attach)]
+        while stack:
+            node, parent, existing = stack.pop()
+            if existing:
+                index = parent
+            else:
+                index = len(uris)
+                uris.append(node['post']['uri'])
+                parents.append(parent)
+                if posts is not None:
+                    posts.append(node['post'])
+            replies = [reply for reply in node.get('replies') or [] if reply.get('$type', THREAD_VIEW) == THREAD_VIEW]
+            # A node fetched to expand it is never cut off again, even if the server still omits its replies.
+            if 'replies' not in node and node['post'].get('replyCount') and not existing:
+                truncated.append((index, node['post']['uri']))
+                continue
+            # Reversed so that replies come out in the order the server listed them.
+            stack.extend((reply, index, False) for reply in reversed(replies))
+        return truncated
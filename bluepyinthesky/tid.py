@@ -0,0 +1,57 @@
+import random
+import threading
+import time
+
+# Timestamp identifiers (TIDs) are the record keys the PDS itself assigns.
+# 53 bits of microseconds since the epoch plus a 10 bit clock id, written in
+# sortable base32 so that later keys always sort after earlier ones.
+S32_CHARS = '234567abcdefghijklmnopqrstuvwxyz'
+TID_LENGTH = 13
+
+_lock = threading.Lock()
+_last_timestamp = 0
+_clock_id = random.randrange(1024)
+
+
+def s32_encode(value):
+    chars = []
+    while value:
+        value, remainder = divmod(value, 32)
+        chars.append(S32_CHARS[remainder])
+    return ''.join(reversed(chars)).rjust(TID_LENGTH, S32_CHARS[0])
+
+
+def s32_decode(value):
+    result = 0
+    for char in value:
+        result = result * 32 + S32_CHARS.index(char)
+    return result
+
+
+def next_tid():
+    """
+    Generate a new TID record key. Keys from one process are strictly increasing.
+    Usage:
+        rkey = next_tid()
+        print(rkey)  # e.g. 3jzfcijpj2z2a
+    Returns:
+        str: A 13 character TID.
+    """
+    global _last_timestamp
+    with _lock:
+        timestamp = max(int(time.time() * 1_000_000), _last_timestamp + 1)
+        _last_timestamp = timestamp
+    return s32_encode((timestamp << 10) | _clock_id)
+
+
+def tid_timestamp(tid):
+    """
+    Get the creation time encoded in a TID.
+    Args:
+        tid (str): The TID to decode.
+    Returns:
+        float: Seconds since the epoch.
+    """
+    if len(tid) != TID_LENGTH:
+        raise ValueError(f"Invalid TID: {tid}")
+    return (s32_decode(tid) >> 10) / 1_000_000
@@ -0,0 +1,197 @@
+from concurrent.futures import Future
+import threading
+from .ipld import record_cid
+from .repo import Repo
+from .tid import next_tid
+
+# com.atproto.repo.applyWrites rejects batches larger than this.
+MAX_BATCH_SIZE = 200
+
+
+def create_write(repo, collection, record, rkey=None):
+    """
+    Build an applyWrites create operation together with the uri and cid the record will have,
+    without talking to the server. The reference can be used straight away by dependent writes.
+    Usage:
+        post, post_ref = create_write("did:example:123", "app.bsky.feed.post", post_record)
+        like, _ = create_write("did:example:123", "app.bsky.feed.like",
+                               {"$type": "app.bsky.feed.like", "subject": post_ref, "createdAt": "..."})
+        Repo().applyWrites(repo="did:example:123", writes=[post, like])
+    Args:
+        repo (str): The DID of the repo. Use the DID rather than a handle so the uri matches the server's.
+        collection (str): The NSID of the record collection.
+        record (dict): The record to create. It must include its "$type" for the cid to match.
+        rkey (str, optional): The key of the record. Defaults to a new TID.
+    Returns:
+        tuple: The applyWrites#create operation and a {"uri", "cid"} strong reference.
+    """
+    rkey = rkey or next_tid()
+    write = {
+        "$type": "com.atproto.repo.applyWrites#create",
+        "collection": collection,
+        "rkey": rkey,
+        "value": record
+    }
+    ref = {
+        "uri": f"at://{repo}/{collection}/{rkey}",
+        "cid": record_cid(record)
+    }
+    return write, ref
+
+
+class WriteQueue:
+    '''
+    Buffers single record writes and sends them to com.atproto.repo.applyWrites in batches.
+    Each queued write returns a Future that resolves to that write's own result.
+    '''
+    def __init__(self, repo, max_batch=MAX_BATCH_SIZE, max_delay=1.0, validate=True, client=None):
+        """
+        Args:
+            repo (str): The handle or DID of the repo to write to.
+            max_batch (int, optional): Flush once this many writes are queued. Defaults to 200.
+            max_delay (float, optional): Flush a partial batch after this many seconds. Defaults to 1.0.
+            validate (bool, optional): Validate the records? Defaults to True.
+            client (Repo, optional): The Repo instance used to send batches. Defaults to a new Repo().
+        """
+        if not 0 < max_batch <= MAX_BATCH_SIZE:
+            raise ValueError(f"max_batch must be between 1 and {MAX_BATCH_SIZE}")
+        self.repo = repo
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.validate = validate
+        self.client = client or Repo()
+        self.pending = []
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.timer = None
+
+    def create(self, collection, record, rkey=None):
+        """
+        Queue the creation of a record.
+        Usage:
+            with WriteQueue(repo="did:example:123") as queue:
+                future = queue.create("app.bsky.feed.post", {"text": "hello", "createdAt": "..."})
+            print(future.result())
+        Args:
+            collection (str): The NSID of the record collection.
+            record (dict): The record to create.
+            rkey (str, optional): The key of the record. Defaults to a new TID.
+        Returns:
+            Future: Resolves to a dict with the uri and cid of the new record.
+        """
+        return self.create_with_ref(collection, record, rkey)[1]
+
+    def create_with_ref(self, collection, record, rkey=None):
+        """
+        Queue the creation of a record and return its uri and cid right away, so that
+        replies, likes or reposts of it can be queued before the batch is sent.
+        Usage:
+            post_ref, _ = queue.create_with_ref("app.bsky.feed.post", post_record)
+            queue.create("app.bsky.feed.like", {"$type": "app.bsky.feed.like", "subject": post_ref, "createdAt": "..."})
+        Args:
+            collection (str): The NSID of the record collection.
+            record (dict): The record to create.
+            rkey (str, optional): The key of the record. Defaults to a new TID.
+        Returns:
+            tuple: The locally computed {"uri", "cid"} reference and a Future for the server's result.
+        """
+        write, ref = create_write(self.repo, collection, record, rkey)
+        return ref, self._enqueue(write, ref)
+
+    def put(self, collection, rkey, record):
+        """
+        Queue the update of an existing record.
+        Args:
+            collection (str): The NSID of the record collection.
+            rkey (str): The key of the record.
+            record (dict): The new value of the record.
+        Returns:
+            Future: Resolves to a dict with the uri and cid of the written record.
+        """
+        return self._enqueue({
+            "$type": "com.atproto.repo.applyWrites#update",
+            "collection": collection,
+            "rkey": rkey,
+            "value": record
+        })
+
+    def delete(self, collection, rkey):
+        """
+        Queue the deletion of a record.
+        Args:
+            collection (str): The NSID of the record collection.
+            rkey (str): The key of the record.
+        Returns:
+            Future: Resolves to a dict with the uri of the deleted record.
+        """
+        return self._enqueue({
+            "$type": "com.atproto.repo.applyWrites#delete",
+            "collection": collection,
+            "rkey": rkey
+        })
+
+    def flush(self):
+        """
+        Send everything queued so far, in as many applyWrites calls as needed.
+        """
+        with self.flush_lock:
+            while True:
+                with self.lock:
+                    if self.timer is not None:
+                        self.timer.cancel()
+                        self.timer = None
+                    batch = self.pending[:self.max_batch]
+                    del self.pending[:self.max_batch]
+                if not batch:
+                    return
+                self._send(batch)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _enqueue(self, write, ref=None):
+        future = Future()
+        with self.lock:
+            self.pending.append((write, future, ref))
+            full = len(self.pending) >= self.max_batch
+            if not full and self.timer is None:
+                self.timer = threading.Timer(self.max_delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            self.flush()
+        return future
+
+    def _send(self, batch):
+        writes = [write for write, _, _ in batch]
+        try:
+            response = self.client.applyWrites(self.repo, writes, validate=self.validate)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        if response is None or "error" in response:
+            # applyWrites is a single transaction, so a failure applies to every write in it.
+            error = Exception(f"applyWrites failed: {response}")
+            for _, future, _ in batch:
+                future.set_exception(error)
+            return
+        results = response.get("results") or [None] * len(batch)
+        for (write, future, ref), result in zip(batch, results):
+            future.set_result(self._result_for(write, ref, result))
+
+    def _result_for(self, write, ref, result):
+        if result:
+            return {key: value for key, value in result.items() if key != "$type"}
+        # Older servers do not echo per-write results; fall back to what is known locally.
+        if ref is not None:
+            return dict(ref)
+        if "rkey" not in write:
+            return {}
+        return {"uri": f"at://{self.repo}/{write['collection']}/{write['rkey']}"}
@@ -0,0 +1,147 @@
+import os
+import socket
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from bluepyinthesky.endpoints import EndpointPool, PooledRequests
+
+
+class StandIn:
+    '''
+    Local xrpc stand-in that answers every request with a fixed status after a fixed delay.
+    '''
+    def __init__(self, status=200, delay=0.0):
+        self.status = status
+        self.delay = delay
+        self.hits = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.hits.append((self.command, self.path))
+                time.sleep(stand_in.delay)
+                body = b'{}'
+                self.send_response(stand_in.status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                if self.headers.get('Content-Length'):
+                    self.rfile.read(int(self.headers['Content-Length']))
+                self.do_GET()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/xrpc"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def closed_url():
+    # A port that was free a moment ago, so connections to it are refused.
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/xrpc"
+
+
+class EndpointPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.stand_ins = []
+
+    def tearDown(self):
+        for stand_in in self.stand_ins:
+            stand_in.close()
+
+    def stand_in(self, status=200, delay=0.0):
+        stand_in = StandIn(status, delay)
+        self.stand_ins.append(stand_in)
+        return stand_in
+
+    def test_prefers_configured_order_until_measured(self):
+        slow, fast = self.stand_in(delay=0.2), self.stand_in()
+        pool = EndpointPool([slow.url, fast.url], probe_interval=None)
+        self.assertEqual(pool.best(), slow.url)
+        pool.probe()
+        self.assertEqual(pool.best(), fast.url)
+
+    def test_selection_follows_request_latency(self):
+        slow, fast = self.stand_in(delay=0.2), self.stand_in()
+        pool = EndpointPool([slow.url, fast.url], probe_interval=None)
+        self.assertEqual(pool.request('GET', 'app.bsky.actor.getProfile').status_code, 200)
+        pool.record(fast.url, 0.001)
+        self.assertEqual(pool.best(), fast.url)
+        pool.request('GET', 'app.bsky.actor.getProfile')
+        self.assertEqual(len(fast.hits), 1)
+
+    def test_fails_over_on_5xx_and_takes_endpoint_out_of_rotation(self):
+        failing, healthy = self.stand_in(status=503), self.stand_in()
+        pool = EndpointPool([failing.url, healthy.url], probe_interval=None, cooldown=60)
+        # Measured as the fastest, so it stays preferred until its error rate crosses the limit.
+        pool.record(failing.url, 0.001)
+        for _ in range(4):
+            self.assertEqual(pool.request('GET', 'app.bsky.feed.getTimeline').status_code, 200)
+        self.assertEqual(len(healthy.hits), 4)
+        self.assertEqual(len(failing.hits), 2)
+        self.assertGreater(pool.stats[0].down_until, time.monotonic())
+        self.assertEqual(pool.best(), healthy.url)
+
+    def test_fails_over_on_connection_errors(self):
+        healthy = self.stand_in()
+        dead = closed_url()
+        pool = EndpointPool([dead, healthy.url], probe_interval=None)
+        self.assertEqual(pool.request('POST', 'com.atproto.repo.createRecord', json={}).status_code, 200)
+        self.assertEqual(len(healthy.hits), 1)
+        self.assertGreater(pool.stats[0].error_rate, 0)
+
+    def test_fails_over_on_timeouts_for_queries(self):
+        stalled, healthy = self.stand_in(delay=1.0), self.stand_in()
+        pool = EndpointPool([stalled.url, healthy.url], probe_interval=None, timeout=0.2)
+        self.assertEqual(pool.request('GET', 'app.bsky.feed.getTimeline').status_code, 200)
+        self.assertEqual(len(healthy.hits), 1)
+
+    def test_does_not_resend_procedures_after_5xx(self):
+        failing, healthy = self.stand_in(status=500), self.stand_in()
+        pool = EndpointPool([failing.url, healthy.url], probe_interval=None)
+        self.assertEqual(pool.request('POST', 'com.atproto.repo.createRecord', json={}).status_code, 500)
+        self.assertEqual(len(healthy.hits), 0)
+
+    def test_returns_last_5xx_when_every_endpoint_fails(self):
+        first, second = self.stand_in(status=502), self.stand_in(status=503)
+        pool = EndpointPool([first.url, second.url], probe_interval=None)
+        self.assertEqual(pool.request('GET', 'app.bsky.feed.getTimeline').status_code, 503)
+
+    def test_pooled_requests_routes_client_urls_through_the_pool(self):
+        failing, healthy = self.stand_in(status=503), self.stand_in()
+        pool = EndpointPool([failing.url, healthy.url], probe_interval=None)
+        http = PooledRequests(pool)
+        response = http.get(f"{pool.best()}/app.bsky.actor.getProfile", params={'actor': 'robcerda.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(healthy.hits, [('GET', '/xrpc/app.bsky.actor.getProfile?actor=robcerda.com')])
+        self.assertGreater(pool.stats[0].error_rate, 0)
+
+    def test_pooled_requests_sends_other_urls_directly(self):
+        other, pooled = self.stand_in(), self.stand_in()
+        pool = EndpointPool([pooled.url], probe_interval=None)
+        PooledRequests(pool).get(f"{other.url}/com.atproto.repo.getRecord")
+        self.assertEqual(len(other.hits), 1)
+        self.assertEqual(len(pooled.hits), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
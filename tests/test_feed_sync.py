@@ -0,0 +1,99 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from bluepyinthesky.feed_sync import SCHEMA, FeedSync
+
+
+class FakeFeed:
+    '''
+    An author feed served newest first, with offset cursors that stay valid as posts are added.
+    '''
+    def __init__(self):
+        self.posts = []
+
+    def post(self, count):
+        for _ in range(count):
+            n = len(self.posts)
+            self.posts.insert(0, {'post': {'uri': f"at://did:plc:author/app.bsky.feed.post/{n}",
+                                           'author': {'did': 'did:plc:author'},
+                                           'indexedAt': f"2024-01-01T00:00:{n:02d}.000Z"}})
+
+    def getAuthorFeed(self, actor, limit=50, cursor=None):
+        # The cursor is the indexedAt of the last item returned, as the server does it.
+        start = 0
+        if cursor is not None:
+            start = next(i for i, item in enumerate(self.posts) if item['post']['indexedAt'] < cursor)
+        page = self.posts[start:start + limit]
+        result = {'feed': page}
+        if start + limit < len(self.posts):
+            result['cursor'] = page[-1]['post']['indexedAt']
+        return result
+
+
+class FeedSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'feeds.sqlite3')
+        self.feed = FakeFeed()
+        self.sync = FeedSync(self.path, page_size=5, client=self.feed)
+
+    def tearDown(self):
+        self.sync.db.close()
+        shutil.rmtree(self.directory)
+
+    def stored(self):
+        return {item['post']['uri'] for item in self.sync.items('author:a')}
+
+    def all_posts(self):
+        return {item['post']['uri'] for item in self.feed.posts}
+
+    def test_incremental_sync(self):
+        self.feed.post(7)
+        self.assertEqual(self.sync.sync_author('a'), 7)
+        self.feed.post(2)
+        self.assertEqual(self.sync.sync_author('a'), 2)
+        self.assertEqual(self.sync.sync_author('a'), 0)
+        self.assertEqual(self.stored(), self.all_posts())
+
+    def test_page_limited_sync_resumes(self):
+        self.feed.post(3)
+        self.sync.sync_author('a', max_pages=1)
+        self.feed.post(12)
+        # Only the top page fits: the mark stays put and the walk resumes on the next call.
+        self.assertEqual(self.sync.sync_author('a', max_pages=1), 5)
+        state = self.sync.state('author:a')
+        self.assertEqual(state['newest_key'], self.feed.posts[12]['post']['uri'])
+        self.assertEqual(state['pending_key'], self.feed.posts[0]['post']['uri'])
+        self.assertIsNotNone(state['resume_cursor'])
+        self.assertEqual(self.sync.sync_author('a', max_pages=1), 5)
+        self.feed.post(1)
+        self.sync.sync_author('a')
+        self.assertEqual(self.stored(), self.all_posts())
+        state = self.sync.state('author:a')
+        self.assertEqual(state['newest_key'], self.feed.posts[0]['post']['uri'])
+        self.assertIsNone(state['resume_cursor'])
+
+    def test_first_sync_is_bounded(self):
+        self.feed.post(12)
+        self.assertEqual(self.sync.sync_author('a', max_pages=1), 5)
+        self.assertIsNone(self.sync.state('author:a')['resume_cursor'])
+        self.assertEqual(self.sync.sync_author('a', max_pages=1), 0)
+
+    def test_old_database_is_migrated(self):
+        self.sync.db.close()
+        os.remove(self.path)
+        db = sqlite3.connect(self.path)
+        db.executescript(SCHEMA.replace(',\n    pending_key TEXT,\n    pending_at TEXT,\n    resume_cursor TEXT', ''))
+        db.close()
+        self.sync = FeedSync(self.path, page_size=5, client=self.feed)
+        self.feed.post(3)
+        self.assertEqual(self.sync.sync_author('a'), 3)
+        self.assertIsNone(self.sync.state('author:a')['resume_cursor'])
+
+
+if __name__ == '__main__':
+    unittest.main()
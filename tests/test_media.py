@@ -0,0 +1,47 @@
+import io
+import os
+import sys
+import unittest
+from PIL import Image, ImageCms
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from bluepyinthesky.media import process_image
+
+
+def encoded(mode, format, size=(64, 48)):
+    image = Image.new(mode, size, (200, 100, 50, 128)[:len(mode)])
+    icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera maker'
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, icc_profile=icc_profile, exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+class ProcessImageTest(unittest.TestCase):
+    def assert_no_metadata(self, data):
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertNotIn('icc_profile', image.info)
+            self.assertNotIn('exif', image.info)
+            self.assertEqual(len(image.getexif()), 0)
+
+    def test_source_has_metadata(self):
+        with Image.open(io.BytesIO(encoded('RGBA', 'PNG'))) as image:
+            self.assertIn('icc_profile', image.info)
+
+    def test_png_is_stripped(self):
+        result = process_image(encoded('RGBA', 'PNG'))
+        self.assertEqual(result['mimeType'], 'image/png')
+        self.assert_no_metadata(result['data'])
+
+    def test_jpeg_is_stripped(self):
+        result = process_image(encoded('RGB', 'JPEG'))
+        self.assertEqual(result['mimeType'], 'image/jpeg')
+        self.assert_no_metadata(result['data'])
+
+    def test_downscales_to_max_dimension(self):
+        result = process_image(encoded('RGB', 'JPEG', size=(400, 100)), max_dimension=200)
+        self.assertEqual(result['aspectRatio'], {'width': 200, 'height': 50})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import sys
+import os
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from bluepyinthesky.firehose import FirehoseRecorder, FirehoseReplayServer, STREAMS
+from tornado.websocket import websocket_connect
+
+def record(args):
+    count = FirehoseRecorder().record(args.path, streams=tuple(args.stream), cursor=args.cursor,
+                                      max_frames=args.max_frames, duration=args.duration, timeout=args.timeout)
+    print(f"Recorded {count} frames to {args.path}")
+
+def replay(args):
+    with FirehoseReplayServer(args.path, speed=args.speed, host=args.host, port=args.port) as server:
+        for name in STREAMS:
+            print(f"Replaying {args.path} at {server.stream_url(name)}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+async def read_stream(url):
+    connection = await websocket_connect(url)
+    frames = 0
+    size = 0
+    while True:
+        message = await connection.read_message()
+        if message is None:
+            return frames, size
+        frames += 1
+        size += len(message)
+
+def bench(args):
+    with FirehoseReplayServer(args.path, speed=args.speed) as server:
+        for name in args.stream:
+            started = time.monotonic()
+            frames, size = asyncio.run(read_stream(server.stream_url(name)))
+            elapsed = time.monotonic() - started
+            print(f"{name}: {frames} frames, {size} bytes in {elapsed:.3f}s "
+                  f"({frames / elapsed:.0f} frames/s, {size / elapsed / 1e6:.2f} MB/s)")
+
+def parse_speed(value):
+    if value == 'max':
+        return None
+    return float(value.rstrip('x'))
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay firehose frames for load testing.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help="Record frames from the live service.")
+    record_parser.add_argument('path')
+    record_parser.add_argument('--stream', action='append', choices=list(STREAMS), default=None)
+    record_parser.add_argument('--cursor', type=int, default=None)
+    record_parser.add_argument('--max-frames', type=int, default=None)
+    record_parser.add_argument('--duration', type=float, default=None)
+    record_parser.add_argument('--timeout', type=float, default=30, help="Seconds to wait for the next frame")
+    record_parser.set_defaults(func=record)
+
+    replay_parser = subparsers.add_parser('replay', help="Serve a recording from a local stand-in server.")
+    replay_parser.add_argument('path')
+    replay_parser.add_argument('--speed', type=parse_speed, default=1.0, help="1x, 10x, ... or max")
+    replay_parser.add_argument('--host', default='127.0.0.1')
+    replay_parser.add_argument('--port', type=int, default=8765)
+    replay_parser.set_defaults(func=replay)
+
+    bench_parser = subparsers.add_parser('bench', help="Measure read throughput of a recording.")
+    bench_parser.add_argument('path')
+    bench_parser.add_argument('--stream', action='append', choices=list(STREAMS), default=None)
+    bench_parser.add_argument('--speed', type=parse_speed, default=None, help="1x, 10x, ... or max")
+    bench_parser.set_defaults(func=bench)
+
+    args = parser.parse_args()
+    if getattr(args, 'stream', False) is None:
+        args.stream = ['com.atproto.sync.subscribeRepos']
+    args.func(args)
+
+if __name__ == "__main__":
+    main()